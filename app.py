@@ -12,13 +12,20 @@ Features:
 - Return Calculator
 - AMC-wise Fund Browsing
 - No hardcoded data - All live from AMFI
+
+Implementation notes:
+- Numeric helpers convert NAV/return series to a contiguous float64 ndarray once
+  (DataProcessor._as_array) and work on NumPy slices from there. Avoid per-element
+  .iloc/.loc access in loops - pandas scalar indexing dominates tight loops.
 """
 
 import streamlit as st
 import pandas as pd
 import numpy as np
 from mftool import Mftool
+from requests.adapters import HTTPAdapter, Retry
 import os
+import re
 
 # Try to initialize fund database if not already loaded    # Database  # Database load is optional
 import yfinance as yf
@@ -28,6 +35,14 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import warnings
 from functools import lru_cache
+from heapq import nlargest
+from itertools import islice
+from operator import itemgetter
+from dataclasses import dataclass
+from types import MappingProxyType
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from numba import njit
 
 # AI Planner removed - focusing on core fund analysis
 
@@ -45,7 +60,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     [data-testid="stMetric"] {
         background: rgba(255,255,255,0.05);
@@ -69,24 +84,129 @@ st.markdown("""
         margin: 10px 0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# st.html sends style-only content without adding a layout element
+st.html(CUSTOM_CSS)
+
+# =============================================================================
+# SCHEME NAME FILTERS
+# =============================================================================
+
+# Dividend/payout and other plan variants hidden across the app (Growth/Regular only)
+EXCLUDE_PATTERNS = frozenset({'dividend', 'idcw', 'monthly', 'quarterly', 'semi-annual', 'annual', 'payout', 'bonus', 'weekly', 'daily', 'fortnightly', 'direct', 'reinvestment', 'distribution', 'income option', 'plan b', 'plan c', 'institutional', 'withdrawl', 'fixed term', 'capital protection', 'fmp', 'ftp', 'series', 'nfo', 'maturity'})
+
+# Shorter exclusion list used by the Performance page
+PERFORMANCE_EXCLUDE_PATTERNS = frozenset({'dividend', 'idcw', 'monthly', 'quarterly', 'payout', 'bonus', 'direct'})
+
+EQUITY_KEYWORDS = frozenset({'equity', 'large cap', 'mid cap', 'small cap', 'multi cap', 'flexi cap', 'concentrated'})
+DEBT_KEYWORDS = frozenset({'debt', 'banking', 'psu', 'credit', 'bond', 'liquid', 'ultra', 'overnight'})
+HYBRID_KEYWORDS = frozenset({'hybrid', 'balanced', 'allocation'})
+
+# Market-cap buckets used by the Auto Portfolio Maker
+MARKET_CAP_KEYWORDS = ('large', 'mid', 'small')
+
+def _keyword_regex(keywords):
+    """Compile substrings into one alternation regex (matches if any substring is present)"""
+    # Longest alternatives first keeps the alternation deterministic and avoids re-trying prefixes
+    ordered = sorted(keywords, key=lambda kw: (-len(kw), kw))
+    return re.compile("|".join(map(re.escape, ordered)))
+
+_EXCLUDE_RE = _keyword_regex(EXCLUDE_PATTERNS)
+_PERFORMANCE_EXCLUDE_RE = _keyword_regex(PERFORMANCE_EXCLUDE_PATTERNS)
+_EQUITY_RE = _keyword_regex(EQUITY_KEYWORDS)
+_DEBT_RE = _keyword_regex(DEBT_KEYWORDS)
+_HYBRID_RE = _keyword_regex(HYBRID_KEYWORDS)
+
+@lru_cache(maxsize=4096)
+def classify_scheme(name):
+    """Get the asset class of a scheme name: 'equity', 'debt', 'hybrid' or None (first match wins)"""
+    name_lower = name.lower()
+    if _EQUITY_RE.search(name_lower):
+        return 'equity'
+    if _DEBT_RE.search(name_lower):
+        return 'debt'
+    if _HYBRID_RE.search(name_lower):
+        return 'hybrid'
+    return None
 
 # =============================================================================
 # CACHE & INITIALIZATION
 # =============================================================================
 
+# Largest number of concurrent mftool requests; the HTTP pool holds as many keep-alive
+# connections so no batch worker ever opens (and drops) a fresh socket
+FETCH_POOL_SIZE = 32
+
 @st.cache_resource
 def init_mftool():
     """Initialize mftool instance"""
-    return Mftool()
+    mf = Mftool()
+    
+    # mftool routes its AMFI/mfapi calls through one requests session - size its connection
+    # pool for concurrent NAV fetches so sockets (and TLS handshakes) are reused, and retry
+    # transient server errors
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=FETCH_POOL_SIZE,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+    )
+    mf._session.mount("https://", adapter)
+    mf._session.mount("http://", adapter)
+
+    # Mftool() fetches the scheme list in its constructor, before the adapter above is
+    # mounted - if that unretried fetch came back empty, re-issue it through the adapter
+    if not mf._scheme_codes:
+        mf._scheme_codes_cache.clear()
+        mf._scheme_codes = mf.get_scheme_codes().keys()
+    return mf
+
+# Disk caches are one pickle per key, overwritten in place and expired by file mtime, so app
+# restarts reuse them without the cache directory growing (persist="disk" memo files are never
+# deleted and ignore ttl). mftool returns empty results instead of raising on HTTP errors, so
+# the fetchers raise on empty data themselves - failures are neither saved nor memoized.
+SCHEME_CODES_CACHE_PATH = os.path.join(".cache", "scheme_codes.pkl")
+SCHEME_CODES_CACHE_TTL = 24 * 60 * 60
+
+def _read_disk_cache(path, ttl):
+    """Get a pickled object from disk if it was saved within ttl seconds"""
+    try:
+        if datetime.now().timestamp() - os.path.getmtime(path) < ttl:
+            return pd.read_pickle(path)
+    except Exception:
+        pass
+    return None
+
+def _write_disk_cache(path, obj):
+    """Save an object to disk atomically (best effort, e.g. read-only deployments skip it)"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pd.to_pickle(obj, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        pass
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_scheme_codes():
+    """Get all scheme codes from AMFI, reusing the list saved on disk within the last day"""
+    cached = _read_disk_cache(SCHEME_CODES_CACHE_PATH, SCHEME_CODES_CACHE_TTL)
+    if cached:
+        return cached
+    
+    mf = init_mftool()
+    scheme_codes = mf.get_scheme_codes()
+    if not scheme_codes:
+        # mftool memoizes the empty list too; drop it so the next call refetches
+        mf._scheme_codes_cache.clear()
+        raise ValueError("AMFI returned an empty scheme list")
+    _write_disk_cache(SCHEME_CODES_CACHE_PATH, scheme_codes)
+    return scheme_codes
 
-@st.cache_data(ttl=3600)
 def get_all_scheme_codes():
     """Get all available scheme codes from AMFI"""
-    mf = init_mftool()
     try:
-        schemes = mf.get_scheme_codes()
-        return schemes
+        return _fetch_scheme_codes()
     except Exception as e:
         st.error(f"Error fetching schemes: {e}")
         return {}
@@ -99,14 +219,13 @@ def get_amc_schemes(amc_name):
         schemes = mf.get_available_schemes(amc_name)
         
         # Filter to remove dividends and payout variants - keep only Growth and Regular plans
-        exclude_patterns = ['dividend', 'idcw', 'monthly', 'quarterly', 'semi-annual', 'annual', 'payout', 'bonus', 'weekly', 'daily', 'fortnightly', 'direct', 'reinvestment', 'distribution', 'income option', 'plan b', 'plan c', 'institutional', 'withdrawl', 'fixed term', 'capital protection', 'fmp', 'ftp', 'series', 'nfo', 'maturity']
         filtered = {}
         
         for code, name in schemes.items():
             name_lower = name.lower()
             
             # Skip if has exclusion patterns
-            if any(pattern in name_lower for pattern in exclude_patterns):
+            if _EXCLUDE_RE.search(name_lower):
                 continue
             
             # Keep if has 'growth' OR 'regular' (both are non-payout plans)
@@ -118,20 +237,87 @@ def get_amc_schemes(amc_name):
         st.warning(f"Could not fetch schemes for {amc_name}")
         return {}
 
-@st.cache_data(ttl=7200)
+# NAV history is also kept on disk, one file per scheme overwritten in place, so app restarts
+# and evicted memory entries do not refetch it; NAVs publish once a day, hence the 24h TTL
+NAV_CACHE_DIR = os.path.join(".cache", "nav")
+NAV_CACHE_TTL = 24 * 60 * 60
+
+def _scheme_cache_path(cache_dir, scheme_code):
+    """Get a scheme's disk cache file, or None for codes unsafe to use as a filename"""
+    scheme_code = str(scheme_code)
+    if not scheme_code.isdigit():
+        return None
+    return os.path.join(cache_dir, f"{scheme_code}.pkl")
+
+def _read_nav_cache(scheme_code):
+    """Get a scheme's NAV history from disk if it was saved within the TTL"""
+    path = _scheme_cache_path(NAV_CACHE_DIR, scheme_code)
+    if path is None:
+        return None
+    return _read_disk_cache(path, NAV_CACHE_TTL)
+
+def _write_nav_cache(scheme_code, nav_df):
+    """Save a scheme's NAV history to disk (best effort, e.g. read-only deployments skip it)"""
+    path = _scheme_cache_path(NAV_CACHE_DIR, scheme_code)
+    if path is not None:
+        _write_disk_cache(path, nav_df)
+
+@st.cache_data(ttl=7200, max_entries=2000, show_spinner=False)
 def get_scheme_historical_nav(scheme_code):
     """Get historical NAV for a scheme"""
+    cached = _read_nav_cache(scheme_code)
+    if cached is not None:
+        return cached
+    
     mf = init_mftool()
     try:
         data = mf.get_scheme_historical_nav(scheme_code, as_Dataframe=True)
         if data is not None and len(data) > 0:
+            _write_nav_cache(scheme_code, data)
             return data
         return None
     except Exception as e:
         st.warning(f"Could not fetch NAV for scheme {scheme_code}")
         return None
 
-@st.cache_data(ttl=600)
+@st.cache_data(ttl=7200, max_entries=2000, show_spinner=False)
+def clean_nav_array(scheme_code):
+    """Get numeric NAV values and their dates in chronological order"""
+    nav_df = get_scheme_historical_nav(scheme_code)
+    if nav_df is None or 'nav' not in nav_df.columns:
+        return np.empty(0, dtype=np.float64), pd.DatetimeIndex([])
+    
+    # Coerce once per scheme instead of in every analysis helper; mfapi lists newest first,
+    # so flip with array views rather than .iloc[::-1].reset_index()
+    try:
+        # numpy parses a clean string (or already numeric) column in one C-level pass
+        nav_values = np.asarray(nav_df['nav'].to_numpy(), dtype=np.float64)
+    except (TypeError, ValueError):
+        # Placeholders like "N.A." need pandas' per-element coercion
+        nav_values = pd.to_numeric(nav_df['nav'], errors='coerce').to_numpy(dtype=np.float64)
+    valid = ~np.isnan(nav_values)
+    nav_dates = pd.to_datetime(nav_df.index[valid][::-1], format='%d-%m-%Y', errors='coerce')
+    return nav_values[valid][::-1], pd.DatetimeIndex(nav_dates)
+
+@st.cache_data(ttl=7200, max_entries=2000, show_spinner=False)
+def get_daily_returns(scheme_code):
+    """Get chronological daily returns for a scheme as a float64 array"""
+    nav_values, _ = clean_nav_array(scheme_code)
+    if len(nav_values) < 2:
+        return np.empty(0, dtype=np.float64)
+    # A zero NAV followed by another zero gives 0/0 = NaN; drop those like pct_change().dropna()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(nav_values) / nav_values[:-1]
+    return returns[~np.isnan(returns)]
+
+def get_navs_batch(scheme_codes, max_workers=8):
+    """Get historical NAVs for several schemes concurrently"""
+    # Each fetch is network-bound and individually cached, so threads overlap the I/O
+    scheme_codes = list(scheme_codes)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(scheme_codes, executor.map(get_scheme_historical_nav, scheme_codes)))
+
+@st.cache_data(ttl=600, max_entries=2000, show_spinner=False)
 def get_scheme_quote(scheme_code):
     """Get current quote for a scheme"""
     mf = init_mftool()
@@ -142,24 +328,117 @@ def get_scheme_quote(scheme_code):
         st.warning(f"Could not fetch quote for scheme {scheme_code}")
         return None
 
-@st.cache_data(ttl=3600)
+def get_quotes_batch(scheme_codes, max_workers=8):
+    """Get current quotes for several schemes concurrently"""
+    scheme_codes = list(scheme_codes)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(scheme_codes, executor.map(get_scheme_quote, scheme_codes)))
+
+# Scheme metadata (fund house, category, ...) rarely changes, so it is kept on disk for a
+# week - one file per scheme, overwritten in place like the NAV history
+DETAILS_CACHE_DIR = os.path.join(".cache", "details")
+DETAILS_CACHE_TTL = 7 * 24 * 60 * 60
+
+@st.cache_data(ttl=3600, max_entries=5000, show_spinner=False)
+def _fetch_scheme_details(scheme_code):
+    """Get scheme metadata, reusing the copy saved on disk within the last week"""
+    path = _scheme_cache_path(DETAILS_CACHE_DIR, scheme_code)
+    cached = _read_disk_cache(path, DETAILS_CACHE_TTL) if path is not None else None
+    if cached:
+        return cached
+    
+    details = init_mftool().get_scheme_details(scheme_code)
+    if not details:
+        raise ValueError(f"No details returned for scheme {scheme_code}")
+    if path is not None:
+        _write_disk_cache(path, details)
+    return details
+
 def get_scheme_details(scheme_code):
     """Get details for a scheme"""
-    mf = init_mftool()
     try:
-        details = mf.get_scheme_details(scheme_code)
-        return details
+        return _fetch_scheme_details(scheme_code)
     except Exception as e:
         st.warning(f"Could not fetch details for scheme {scheme_code}")
         return None
 
+def get_details_batch(scheme_codes, max_workers=8):
+    """Get details for several schemes concurrently"""
+    # Details are persisted per scheme on disk, so only cold codes hit the network
+    scheme_codes = list(scheme_codes)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(scheme_codes, executor.map(get_scheme_details, scheme_codes)))
+
 # =============================================================================
 # DATA PROCESSING FUNCTIONS
 # =============================================================================
 
+@njit(cache=True)
+def _stats_kernel(values):
+    """Single pass over rolling returns for min, max, mean/M2 and probability bucket counts"""
+    mn = np.inf
+    mx = -np.inf
+    # Welford's online mean and sum of squared deviations (M2)
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    # Negative, 0-5, 5-10, 10-15, 15-20, >20
+    counts = np.zeros(6, dtype=np.int64)
+    for x in values:
+        if np.isnan(x):
+            continue
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+        if x < mn:
+            mn = x
+        if x > mx:
+            mx = x
+        if x < 0:
+            counts[0] += 1
+        elif x < 5:
+            counts[1] += 1
+        elif x < 10:
+            counts[2] += 1
+        elif x < 15:
+            counts[3] += 1
+        elif x < 20:
+            counts[4] += 1
+        else:
+            counts[5] += 1
+    return mn, mx, n, mean, m2, counts
+
+@njit(cache=True)
+def _moments_batch_kernel(values, offsets):
+    """Mean and population variance of each slice values[offsets[i]:offsets[i + 1]] in a single Welford pass"""
+    count = len(offsets) - 1
+    means = np.zeros(count)
+    variances = np.zeros(count)
+    for i in range(count):
+        # Float64 accumulators keep float32 input numerically stable
+        n = 0
+        mean = 0.0
+        m2 = 0.0
+        for j in range(offsets[i], offsets[i + 1]):
+            x = values[j]
+            n += 1
+            delta = x - mean
+            mean += delta / n
+            m2 += delta * (x - mean)
+        if n > 0:
+            means[i] = mean
+            variances[i] = m2 / n
+    return means, variances
+
 class DataProcessor:
     """Process mutual fund data for analysis"""
     
+    @staticmethod
+    def _as_array(values):
+        """Get values as a contiguous float64 ndarray (no copy if already one)"""
+        return np.ascontiguousarray(values, dtype=np.float64)
+    
     PERIODS = {
         "1Y": 252,
         "3Y": 756,
@@ -171,39 +450,40 @@ class DataProcessor:
     }
     
     @staticmethod
-    def calculate_rolling_returns(nav_series, period_days):
-        """Calculate rolling returns (CAGR) for a given period"""
+    def calculate_rolling_returns(nav_series, period_days, dates=None):
+        """Calculate rolling returns (CAGR) for a given period, indexed by window end date"""
         if len(nav_series) < period_days:
             return None
         
-        # Convert to numeric if strings
-        nav_numeric = pd.to_numeric(nav_series, errors='coerce')
-        nav_numeric = nav_numeric.dropna()
+        # Convert to numeric if strings (arrays from clean_nav_array are already clean)
+        if isinstance(nav_series, np.ndarray):
+            nav = DataProcessor._as_array(nav_series)
+            nav_dates = dates if dates is not None else pd.RangeIndex(len(nav))
+        else:
+            nav_numeric = pd.to_numeric(nav_series, errors='coerce').dropna()
+            nav = DataProcessor._as_array(nav_numeric)
+            nav_dates = nav_numeric.index
         
-        if len(nav_numeric) < period_days:
+        if len(nav) < period_days:
             return None
-        
-        returns = []
-        dates = []
-        
-        for i in range(period_days, len(nav_numeric)):
-            start_nav = nav_numeric.iloc[i - period_days]
-            end_nav = nav_numeric.iloc[i]
-            
-            if start_nav > 0:
-                total_return = (end_nav - start_nav) / start_nav
-                years = period_days / 252
-                cagr = (((end_nav / start_nav) ** (1 / years)) - 1) * 100
-                
-                returns.append(cagr)
-                # Create date by going back from today
-                days_back = len(nav_numeric) - i - 1
-                date = pd.Timestamp.now() - pd.Timedelta(days=days_back)
-                dates.append(date)
-        
-        if len(returns) > 0:
-            return pd.Series(returns, index=dates)
-        return None
+
+        # Pair every NAV with the NAV period_days earlier in one vectorized pass
+        start_nav = nav[:-period_days]
+        end_nav = nav[period_days:]
+        valid = start_nav > 0
+
+        if not valid.any():
+            return None
+
+        # The ratio is a fresh array, so finish the CAGR in that buffer: (ratio ** (1 / years) - 1) * 100
+        years = period_days / 252
+        cagr = end_nav[valid] / start_nav[valid]
+        np.power(cagr, 1 / years, out=cagr)
+        cagr -= 1
+        cagr *= 100
+
+        # Stamp each window with the actual date of its ending NAV
+        return pd.Series(cagr, index=nav_dates[period_days:][valid])
     
     @staticmethod
     def calculate_statistics(returns_series):
@@ -211,67 +491,475 @@ class DataProcessor:
         if returns_series is None or len(returns_series) == 0:
             return {}
         
+        values = DataProcessor._as_array(returns_series)
+        mn, mx, n, mean, m2, counts = _stats_kernel(values)
+        std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+        
         stats = {
-            'Min': returns_series.min(),
-            'Max': returns_series.max(),
-            'Mean': returns_series.mean(),
-            'Median': returns_series.median(),
-            'Std Dev': returns_series.std(),
-            'Sharpe': (returns_series.mean() / returns_series.std() * np.sqrt(252)) if returns_series.std() > 0 else 0,
+            'Min': mn,
+            'Max': mx,
+            'Mean': mean,
+            'Median': np.nanmedian(values),
+            'Std Dev': std,
+            'Sharpe': (mean / std * np.sqrt(252)) if std > 0 else 0,
         }
         
         # Probability buckets
-        stats['Prob(Negative)'] = (returns_series < 0).sum() / len(returns_series) * 100
-        stats['Prob(0-5%)'] = ((returns_series >= 0) & (returns_series < 5)).sum() / len(returns_series) * 100
-        stats['Prob(5-10%)'] = ((returns_series >= 5) & (returns_series < 10)).sum() / len(returns_series) * 100
-        stats['Prob(10-15%)'] = ((returns_series >= 10) & (returns_series < 15)).sum() / len(returns_series) * 100
-        stats['Prob(15-20%)'] = ((returns_series >= 15) & (returns_series < 20)).sum() / len(returns_series) * 100
-        stats['Prob(>20%)'] = (returns_series >= 20).sum() / len(returns_series) * 100
+        probs = counts / len(values) * 100
+        stats['Prob(Negative)'] = probs[0]
+        stats['Prob(0-5%)'] = probs[1]
+        stats['Prob(5-10%)'] = probs[2]
+        stats['Prob(10-15%)'] = probs[3]
+        stats['Prob(15-20%)'] = probs[4]
+        stats['Prob(>20%)'] = probs[5]
         
         return stats
     
+    @staticmethod
+    def annualized_stats_batch(returns_list):
+        """Calculate annualized return, volatility and Sharpe ratio (capped between -5 and 10) for several daily return arrays"""
+        if not returns_list:
+            empty = np.empty(0, dtype=np.float64)
+            return empty, empty, empty
+        lengths = np.fromiter((len(r) for r in returns_list), dtype=np.int64, count=len(returns_list))
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        # Results only need 2 decimals, so stream float32 through the kernel (it accumulates in float64)
+        means, variances = _moments_batch_kernel(np.concatenate(returns_list, dtype=np.float32), offsets)
+        
+        ann_returns = means * 252.0
+        ann_vols = np.sqrt(variances) * np.sqrt(252.0)
+        # NaN volatility (e.g. from a zero NAV) fails the > 0 test and scores 0
+        sharpes = np.zeros_like(ann_returns)
+        np.divide(ann_returns, ann_vols, out=sharpes, where=ann_vols > 0)
+        return ann_returns, ann_vols, np.clip(sharpes, -5.0, 10.0)
+    
+    @staticmethod
+    def _peak_ratio(nav_series):
+        """Get value / running peak at every point, skipping NaN"""
+        values = DataProcessor._as_array(nav_series)
+        values = values[~np.isnan(values)]
+        peak = np.maximum.accumulate(values)
+        # Reuse the peak buffer for the result
+        return np.divide(values, peak, out=peak)
+    
+    @staticmethod
+    def drawdown_series(nav_series):
+        """Calculate drawdown (%) from the running peak at every point"""
+        drawdown = DataProcessor._peak_ratio(nav_series)
+        drawdown -= 1
+        drawdown *= 100
+        return drawdown
+    
     @staticmethod
     def calculate_drawdown(nav_series):
         """Calculate maximum drawdown"""
         if len(nav_series) < 2:
             return 0
         
-        cumulative_max = nav_series.cummax()
-        drawdown = (nav_series - cumulative_max) / cumulative_max * 100
-        return drawdown.min()
+        # (ratio - 1) * 100 is monotonic, so only the smallest ratio needs scaling
+        ratio = DataProcessor._peak_ratio(nav_series)
+        if len(ratio) == 0:
+            return 0
+        return float((ratio.min() - 1) * 100)
+    
+    @staticmethod
+    def quant_summary(returns, cumulative):
+        """Calculate Sortino, Calmar, win rate and max drawdown from returns and cumulative growth"""
+        values = DataProcessor._as_array(returns)
+        n = len(values)
+        if n == 0:
+            return {'Sortino': 0, 'Calmar': 0, 'Win Rate': 0, 'Max Drawdown': 0}
+        
+        mean = values.mean()
+        neg_mask = values < 0
+        neg_count = np.count_nonzero(neg_mask)
+        
+        # Sortino Ratio (like Sharpe but only counts downside) - two-pass std of the negative
+        # returns, so tightly clustered losses don't cancel to zero in sumsq/n - mean**2
+        if neg_count > 0:
+            downside = values[neg_mask]
+            downside_std = np.sqrt(np.mean((downside - downside.mean()) ** 2))
+            sortino = (mean / downside_std * np.sqrt(252)) if downside_std > 0 else 0
+        else:
+            sortino = np.inf if mean > 0 else 0
+        
+        # Calmar Ratio (return / max drawdown)
+        max_dd = DataProcessor.calculate_drawdown(cumulative) / 100
+        calmar = abs(mean / max_dd) if max_dd != 0 else 0
+        
+        return {
+            'Sortino': sortino,
+            'Calmar': calmar,
+            'Win Rate': np.count_nonzero(values > 0) / n * 100,
+            'Max Drawdown': max_dd * 100,
+        }
+
+@st.cache_data(ttl=7200, max_entries=500, show_spinner=False)
+def get_rolling_returns(scheme_code, period):
+    """Get rolling returns (CAGR) for a scheme over a named period"""
+    nav_values, nav_dates = clean_nav_array(scheme_code)
+    return DataProcessor.calculate_rolling_returns(nav_values, DataProcessor.PERIODS[period], nav_dates)
+
+@st.cache_data(ttl=7200, max_entries=500, show_spinner=False)
+def get_rolling_statistics(scheme_code, period):
+    """Get return statistics for a scheme's rolling returns over a named period"""
+    return DataProcessor.calculate_statistics(get_rolling_returns(scheme_code, period))
+
+# Auto Portfolio risk profile allocation mappings (read-only, built once per process)
+RISK_ALLOCATIONS = MappingProxyType({
+    "Conservative": MappingProxyType({"equity": 20, "debt": 80, "hybrid": 0}),
+    "Moderate": MappingProxyType({"equity": 35, "debt": 60, "hybrid": 5}),
+    "Balanced": MappingProxyType({"equity": 50, "debt": 40, "hybrid": 10}),
+    "Aggressive": MappingProxyType({"equity": 70, "debt": 20, "hybrid": 10}),
+    "Very Aggressive": MappingProxyType({"equity": 85, "debt": 10, "hybrid": 5})
+})
+
+# Equity subcategories favoured (1.5x score bonus) for each risk profile
+EQUITY_SUBCATS = MappingProxyType({
+    "Conservative": ("Large Cap",),
+    "Moderate": ("Large Cap", "Multi Cap"),
+    "Balanced": ("Large Cap", "Multi Cap", "Mid Cap"),
+    "Aggressive": ("Mid Cap", "Multi Cap", "Small Cap"),
+    "Very Aggressive": ("Small Cap", "Mid Cap", "Focused", "Sectoral")
+})
+
+# Auto Portfolio Maker slider ranges per risk profile: (equity min, max, default, debt min, max, default)
+RISK_SLIDERS = MappingProxyType({
+    "Conservative": (20, 40, 30, 50, 70, 60),
+    "Moderate": (40, 60, 50, 30, 50, 40),
+    "Aggressive": (60, 80, 70, 10, 30, 20)
+})
+
+# Auto Portfolio Maker recommendation presets (asset class split in %, read-only)
+RECOMMENDATIONS = MappingProxyType({
+    'Income Generation': MappingProxyType({
+        'description': 'Focus on debt & dividend-yielding equity funds',
+        'equity': 30,
+        'debt': 60,
+        'hybrid': 10
+    }),
+    'Capital Growth': MappingProxyType({
+        'description': 'Aggressive equity allocation for long-term growth',
+        'equity': 80,
+        'debt': 10,
+        'hybrid': 10
+    }),
+    'Balanced': MappingProxyType({
+        'description': 'Mix of equity & debt for steady growth',
+        'equity': 50,
+        'debt': 40,
+        'hybrid': 10
+    }),
+    'Tax Efficient': MappingProxyType({
+        'description': 'Tax-saving and ELSS funds for long-term wealth',
+        'equity': 60,
+        'debt': 25,
+        'hybrid': 15
+    })
+})
+
+# Rolling returns benchmark data shown by the Auto Portfolio Maker risk analysis
+ROLLING_RETURNS_DATA = {
+    'Nifty Midcap 150 Momentum 50': {
+        '1Y': {'avg': 22.12, 'sharpe': 4.39, 'std': 3.67},
+        '3Y': {'avg': 20.20, 'sharpe': 1.51, 'std': 8.78},
+        '5Y': {'avg': 20.28, 'sharpe': 1.53, 'std': 1.33},
+        '7Y': {'avg': 18.79, 'sharpe': 2.74, 'std': 7.14},
+        '10Y': {'avg': 17.15, 'sharpe': 4.39, 'std': 10.69}
+    },
+    'Nifty 50': {
+        '1Y': {'avg': 10.77, 'sharpe': 1.99, 'std': 2.40},
+        '3Y': {'avg': 9.90, 'sharpe': 1.53, 'std': 12.20},
+        '5Y': {'avg': 12.30, 'sharpe': 1.91, 'std': 1.33},
+        '7Y': {'avg': 7.14, 'sharpe': 1.97, 'std': 7.14},
+        '10Y': {'avg': 10.77, 'sharpe': 1.99, 'std': 10.69}
+    },
+    'Nifty Smallcap 250': {
+        '1Y': {'avg': 12.19, 'sharpe': 1.46, 'std': 4.23},
+        '3Y': {'avg': 11.50, 'sharpe': 1.62, 'std': 15.30},
+        '5Y': {'avg': 13.40, 'sharpe': 1.82, 'std': 2.10},
+        '7Y': {'avg': 12.80, 'sharpe': 1.88, 'std': 8.90},
+        '10Y': {'avg': 14.20, 'sharpe': 2.15, 'std': 11.50}
+    }
+}
+
+# Same data as (index x period) arrays per statistic, so a period is one contiguous column read
+ROLLING_RETURNS_INDICES = list(ROLLING_RETURNS_DATA)
+ROLLING_RETURNS_PERIODS = ['1Y', '3Y', '5Y', '7Y', '10Y']
+ROLLING_RETURNS_STATS = {
+    stat: np.array([[ROLLING_RETURNS_DATA[index][period][stat] for period in ROLLING_RETURNS_PERIODS]
+                    for index in ROLLING_RETURNS_INDICES])
+    for stat in ('avg', 'sharpe', 'std')
+}
+
+def score_funds(candidates, subcats=(), age_weight=0.0, age_cap=np.inf, min_days=252):
+    """Score (code, name) candidates as (sharpe * 10 + age bonus) * subcategory bonus
+
+    Funds need more than min_days of returns. The age bonus is min(years / 10, age_cap) * age_weight
+    and names containing any of subcats get a 1.5x multiplier. Returns one dict per eligible fund,
+    in candidate order, carrying the annualized return/volatility so later panels need not recompute them.
+    """
+    # Fetch NAVs in parallel up front so the loop below only reads cached data
+    get_navs_batch([code for code, _ in candidates], max_workers=FETCH_POOL_SIZE)
+    
+    picked = []
+    returns_list = []
+    for code, name in candidates:
+        returns = get_daily_returns(code)
+        if len(returns) > min_days:
+            picked.append((code, name))
+            returns_list.append(returns)
+    
+    if not picked:
+        return []
+    
+    ann_returns, ann_vols, sharpes = DataProcessor.annualized_stats_batch(returns_list)
+    lengths = np.array([len(r) for r in returns_list])
+    years = lengths / 252
+    age_bonus = np.minimum(years / 10, age_cap) * age_weight
+    
+    names_lower = np.char.lower(np.array([name for _, name in picked]))
+    has_subcat = np.zeros(len(picked), dtype=bool)
+    for subcat in subcats:
+        has_subcat |= np.char.find(names_lower, subcat.lower()) >= 0
+    cat_bonus = np.where(has_subcat, 1.5, 1.0)
+    
+    scores = (sharpes * 10 + age_bonus) * cat_bonus
+    return [
+        {"code": code, "name": name, "score": score, "sharpe": sharpe,
+         "ann_return": ann_return, "ann_vol": ann_vol, "n": n}
+        for (code, name), score, sharpe, ann_return, ann_vol, n in zip(
+            picked, scores.tolist(), sharpes.tolist(), ann_returns.tolist(), ann_vols.tolist(), lengths.tolist()
+        )
+    ]
 
 # =============================================================================
 # FUND FILTERING HELPER
 # =============================================================================
 
+@dataclass
+class SchemeIndex:
+    """Struct-of-arrays view of all AMFI schemes with precomputed name filters"""
+    codes: np.ndarray
+    names: np.ndarray
+    names_lower: np.ndarray
+    excluded: np.ndarray
+    is_growth: np.ndarray
+    is_equity: np.ndarray
+    is_debt: np.ndarray
+    is_hybrid: np.ndarray
+    amc: np.ndarray
+    
+    def select(self, mask):
+        """Get {code: name} for the schemes selected by a boolean mask"""
+        return dict(zip(self.codes[mask].tolist(), self.names[mask].tolist()))
+
+@st.cache_data(ttl=3600)
+def build_scheme_index():
+    """Categorize every AMFI scheme by name in a single pass"""
+    codes, names, names_lower, amcs = [], [], [], []
+    excluded, is_growth, is_equity, is_debt, is_hybrid = [], [], [], [], []
+    
+    for code, name in get_all_scheme_codes().items():
+        if not name or not isinstance(name, str):
+            continue
+        
+        name_lower = name.lower()
+        codes.append(str(code))
+        names.append(name)
+        names_lower.append(name_lower)
+        excluded.append(_EXCLUDE_RE.search(name_lower) is not None)
+        is_growth.append('growth' in name_lower or 'regular' in name_lower)
+        is_equity.append(_EQUITY_RE.search(name_lower) is not None)
+        is_debt.append(_DEBT_RE.search(name_lower) is not None)
+        is_hybrid.append(_HYBRID_RE.search(name_lower) is not None)
+        
+        # AMC is usually the first word of the scheme name
+        parts = name.split(maxsplit=1)
+        amcs.append(parts[0] if parts and len(parts[0]) > 2 else '')
+    
+    return SchemeIndex(
+        codes=np.array(codes, dtype=str),
+        names=np.array(names, dtype=str),
+        names_lower=np.array(names_lower, dtype=str),
+        excluded=np.array(excluded, dtype=bool),
+        is_growth=np.array(is_growth, dtype=bool),
+        is_equity=np.array(is_equity, dtype=bool),
+        is_debt=np.array(is_debt, dtype=bool),
+        is_hybrid=np.array(is_hybrid, dtype=bool),
+        amc=np.array(amcs, dtype=str),
+    )
+
+def get_amc_list():
+    """Get sorted unique AMC names (first word of each scheme name) from the cached scheme index"""
+    idx = build_scheme_index()
+    return np.unique(idx.amc[idx.amc != '']).tolist()
+
 @st.cache_data(ttl=7200)
 def filter_schemes_by_type(fund_type="equity"):
     """Filter schemes by type - FAST name-based filtering (no API calls)"""
-    all_schemes = get_all_scheme_codes()
-    filtered = {}
+    idx = build_scheme_index()
+    type_masks = {
+        "equity": idx.is_equity,
+        "debt": idx.is_debt,
+        "hybrid": idx.is_hybrid,
+    }
     
-    # Exclude patterns - focus only on dividend/income options, not 'direct' (direct plans are legitimate)
-    exclude_patterns = ['dividend', 'idcw', 'monthly', 'quarterly', 'semi-annual', 'annual', 'payout', 'bonus', 'weekly', 'daily', 'fortnightly', 'direct', 'reinvestment', 'distribution', 'income option', 'plan b', 'plan c', 'institutional', 'withdrawl', 'fixed term', 'capital protection', 'fmp', 'ftp', 'series', 'nfo', 'maturity']
+    type_mask = type_masks.get(fund_type.lower())
+    if type_mask is None:
+        return {}
     
-    for code, name in all_schemes.items():
-        name_lower = name.lower()
-        
-        # Skip if contains exclude pattern (dividend/income variants only)
-        if any(pattern in name_lower for pattern in exclude_patterns):
-            continue
-        
-        # Filter by type using NAME only (no API calls = FAST)
-        if fund_type.lower() == "equity":
-            if any(x in name_lower for x in ['equity', 'large cap', 'mid cap', 'small cap', 'multi cap', 'flexi cap', 'concentrated']):
-                filtered[code] = name
-        elif fund_type.lower() == "debt":
-            if any(x in name_lower for x in ['debt', 'banking', 'psu', 'credit', 'bond', 'liquid', 'ultra', 'overnight']):
-                filtered[code] = name
-        elif fund_type.lower() == "hybrid":
-            if any(x in name_lower for x in ['hybrid', 'balanced', 'allocation']):
-                filtered[code] = name
+    # Skip dividend/income variants, then filter by type using NAME only
+    return idx.select(type_mask & ~idx.excluded)
+
+@st.cache_data(ttl=7200, show_spinner=False)
+def get_scheme_universe():
+    """Get the (equity, debt, hybrid) scheme dicts in one cached call"""
+    return (
+        filter_schemes_by_type("equity"),
+        filter_schemes_by_type("debt"),
+        filter_schemes_by_type("hybrid"),
+    )
+
+@st.cache_data(ttl=7200, show_spinner=False)
+def get_market_cap_picks(per_cap=3):
+    """Get the first per_cap equity (code, name) pairs whose names mention each market cap"""
+    idx = build_scheme_index()
+    equity_mask = idx.is_equity & ~idx.excluded
+    
+    # A "Large & Mid Cap" scheme matches (and can be picked for) both caps
+    picks = {}
+    for cap_key in MARKET_CAP_KEYWORDS:
+        rows = np.flatnonzero(equity_mask & (np.char.find(idx.names_lower, cap_key) >= 0))[:per_cap]
+        picks[cap_key] = list(zip(idx.codes[rows].tolist(), idx.names[rows].tolist()))
+    return picks
+
+# =============================================================================
+# UI HELPERS
+# =============================================================================
+
+def render_scheme_picker(schemes, key):
+    """Show (code, name) pairs as one selectable table and add picked rows to the selection"""
+    codes = [code for code, _ in schemes]
+    names = [name for _, name in schemes]
+    
+    event = st.dataframe(
+        pd.DataFrame({"Scheme": names, "Code": codes}),
+        width='stretch',
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key=f"{key}_{hash(tuple(codes))}"
+    )
     
-    return filtered
+    # Only act on rows picked since the last rerun so removed schemes are not re-added
+    picked = set(event.selection.rows)
+    seen_key = f"{key}_picked"
+    new_rows = picked - st.session_state.get(seen_key, set())
+    st.session_state[seen_key] = picked
+    
+    for row in sorted(new_rows):
+        st.session_state.selected_schemes[codes[row]] = names[row]
+        st.success(f"Added: {names[row]}")
+
+# Shared chart colours (equity/debt/hybrid, then two three-bar palettes) and base layout
+ASSET_CLASS_COLORS = ('#667eea', '#ff6b6b', '#ffd93d')
+PALETTE_PURPLE = ('#667eea', '#764ba2', '#f093fb')
+PALETTE_WARM = ('#ff6b6b', '#ff8c42', '#ffd93d')
+DARK_CHART_LAYOUT = dict(template='plotly_dark', height=400)
+
+NAV_CHART_LAYOUT = dict(
+    xaxis_title="Date",
+    yaxis_title="NAV (₹)",
+    **DARK_CHART_LAYOUT
+)
+
+def downsample(values, max_points=1500):
+    """Get (positions, values) stride-sampled to at most about max_points for plotting, keeping the last point"""
+    values = np.asarray(values)
+    positions = np.arange(len(values))
+    if len(values) <= max_points:
+        return positions, values
+    
+    step = -(-len(values) // max_points)
+    keep = positions[::step]
+    if keep[-1] != positions[-1]:
+        keep = np.append(keep, positions[-1])
+    return keep, values[keep]
+
+@st.cache_data(max_entries=50, show_spinner=False)
+def build_allocation_figures(labels, values):
+    """Get the allocation pie and sunburst figures for matching label/weight tuples"""
+    fig_pie = go.Figure(data=[go.Pie(
+        labels=labels,
+        values=values,
+        marker=dict(line=dict(color='#1f1f1f', width=2))
+    )])
+    
+    fig_pie.update_layout(
+        title="Portfolio Allocation (%)",
+        height=500,
+        template='plotly_dark'
+    )
+    
+    fig_sun = go.Figure(data=[go.Sunburst(
+        labels=("Portfolio",) + labels,
+        parents=("",) + ("Portfolio",) * len(labels),
+        values=(100,) + values,
+        marker=dict(line=dict(color='#1f1f1f', width=2))
+    )])
+    
+    fig_sun.update_layout(
+        title="Hierarchical Allocation",
+        height=500,
+        template='plotly_dark'
+    )
+    
+    return fig_pie, fig_sun
+
+@st.cache_data(max_entries=50, show_spinner=False)
+def build_category_figure(category_data):
+    """Get the equity/debt/hybrid allocation bar figure"""
+    fig_cat = go.Figure(data=[
+        go.Bar(x=['Equity', 'Debt', 'Hybrid'], y=category_data, text=[f"{x:.1f}%" for x in category_data], textposition='outside',
+               marker_color=ASSET_CLASS_COLORS)
+    ])
+    fig_cat.update_layout(
+        title="Asset Class Allocation",
+        yaxis_title="Allocation (%)",
+        showlegend=False,
+        **DARK_CHART_LAYOUT
+    )
+    return fig_cat
+
+@st.cache_data(max_entries=50, show_spinner=False)
+def build_asset_pie(values, title, height):
+    """Get the equity/debt/hybrid pie figure for an (equity, debt, hybrid) percentage tuple"""
+    fig = go.Figure(data=[go.Pie(
+        labels=['Equity', 'Debt', 'Hybrid'],
+        values=values,
+        marker=dict(colors=ASSET_CLASS_COLORS)
+    )])
+    fig.update_layout(title=title, height=height, template='plotly_dark')
+    return fig
+
+@st.cache_data(max_entries=50, show_spinner=False)
+def build_bar_figure(x, y, text, colors, title, yaxis_title=None):
+    """Get a single-trace bar figure with outside value labels"""
+    fig = go.Figure(data=[go.Bar(
+        x=x,
+        y=y,
+        text=text,
+        textposition='outside',
+        marker_color=colors
+    )])
+    fig.update_layout(
+        title=title,
+        yaxis_title=yaxis_title,
+        showlegend=False,
+        **DARK_CHART_LAYOUT
+    )
+    return fig
 
 # =============================================================================
 # SIDEBAR - FUND SELECTION
@@ -294,12 +982,6 @@ with st.sidebar:
     # Initialize session state for selected schemes
     if 'selected_schemes' not in st.session_state:
         st.session_state.selected_schemes = {}
-    if 'equity_cache' not in st.session_state:
-        st.session_state.equity_cache = None
-    if 'debt_cache' not in st.session_state:
-        st.session_state.debt_cache = None
-    if 'hybrid_cache' not in st.session_state:
-        st.session_state.hybrid_cache = None
 
 # =============================================================================
 # PAGE: HOME
@@ -369,28 +1051,20 @@ elif page == "🔎 Search Funds":
         )
         
         if search_query:
-            all_schemes = get_all_scheme_codes()
+            idx = build_scheme_index()
             
-            if all_schemes:
-                # Search in both keys (codes) and values (names)
+            if len(idx.codes) > 0:
+                # Search in both codes and names with vectorized substring scans
                 query_lower = search_query.lower()
-                results = {}
-                
-                exclude_patterns = ['dividend', 'idcw', 'monthly', 'quarterly', 'semi-annual', 'annual', 'payout', 'bonus', 'weekly', 'daily', 'fortnightly', 'direct', 'reinvestment', 'distribution', 'income option', 'plan b', 'plan c', 'institutional', 'withdrawl', 'fixed term', 'capital protection', 'fmp', 'ftp', 'series', 'nfo', 'maturity']
-
-                for code, name in all_schemes.items():
-                    name_lower = name.lower()
-                    if any(exclude in name_lower for exclude in exclude_patterns):
-                        continue
-                        
-                    if query_lower in code.lower() or query_lower in name_lower:
-                        results[code] = name
+                matches = (np.char.find(idx.names_lower, query_lower) >= 0) | (np.char.find(idx.codes, query_lower) >= 0)
+                matches &= ~idx.excluded
                 
-                if results:
-                    st.success(f"Found {len(results)} matching schemes")
+                if matches.any():
+                    st.success(f"Found {int(matches.sum())} matching schemes")
                     
                     # Sort results alphabetically by scheme name
-                    sorted_results = sorted(results.items(), key=lambda x: x[1].lower())
+                    order = np.argsort(idx.names_lower[matches], kind='stable')
+                    sorted_results = list(zip(idx.codes[matches][order].tolist(), idx.names[matches][order].tolist()))
                     
                     # Pagination for search results
                     page_num = st.number_input("Page:", min_value=1, value=1, step=1, key="search_page")
@@ -400,17 +1074,7 @@ elif page == "🔎 Search Funds":
                     end_idx = start_idx + items_per_page
                     paginated_results = sorted_results[start_idx:end_idx]
                     
-                    for code, name in paginated_results:
-                        col1, col2, col3 = st.columns([3, 3, 1])
-                        
-                        with col1:
-                            st.write(f"**{name}**")
-                        with col2:
-                            st.caption(f"Code: {code}")
-                        with col3:
-                            if st.button("📌", key=f"select_{code}"):
-                                st.session_state.selected_schemes[code] = name
-                                st.success(f"Added: {name}")
+                    render_scheme_picker(paginated_results, key="search_table")
                 else:
                     st.warning("No schemes found matching your search")
     
@@ -422,18 +1086,7 @@ elif page == "🔎 Search Funds":
         col1, col2 = st.columns(2)
         
         # Get all schemes to extract unique AMCs
-        all_schemes = get_all_scheme_codes()
-        amc_list = []
-        for scheme_name in all_schemes.values():
-            # Extract AMC name from scheme name (usually first word or before "Prudential", etc.)
-            if scheme_name and isinstance(scheme_name, str):
-                parts = scheme_name.split()
-                if len(parts) > 0:
-                    amc = parts[0]
-                    if amc not in amc_list and len(amc) > 2:
-                        amc_list.append(amc)
-        
-        amc_list = sorted(list(set(amc_list)))  # All AMCs sorted
+        amc_list = get_amc_list()  # All AMCs sorted
         
         with col1:
             selected_amc = st.selectbox("Search or Select AMC:", amc_list, key="amc_select")
@@ -478,17 +1131,7 @@ elif page == "🔎 Search Funds":
                     end_idx = start_idx + items_per_page
                     paginated = list(amc_schemes.items())[start_idx:end_idx]
                     
-                    for code, name in paginated:
-                        col1, col2, col3 = st.columns([3, 3, 1])
-                        
-                        with col1:
-                            st.write(f"**{name}**")
-                        with col2:
-                            st.caption(f"Code: {code}")
-                        with col3:
-                            if st.button("📌", key=f"amc_select_{code}"):
-                                st.session_state.selected_schemes[code] = name
-                                st.success(f"Added: {name}")
+                    render_scheme_picker(paginated, key="amc_table")
                 else:
                     st.warning(f"No {fund_type_filter} Growth schemes found for {selected_amc}")
     
@@ -503,19 +1146,9 @@ elif page == "🔎 Search Funds":
             horizontal=True
         )
         
-        # Use session cache for filtered results
-        if fund_type == "Equity Funds":
-            if st.session_state.equity_cache is None:
-                st.session_state.equity_cache = filter_schemes_by_type("equity")
-            filtered = st.session_state.equity_cache
-        elif fund_type == "Debt Funds":
-            if st.session_state.debt_cache is None:
-                st.session_state.debt_cache = filter_schemes_by_type("debt")
-            filtered = st.session_state.debt_cache
-        else:
-            if st.session_state.hybrid_cache is None:
-                st.session_state.hybrid_cache = filter_schemes_by_type("hybrid")
-            filtered = st.session_state.hybrid_cache
+        # Cached filter over the shared scheme index (reused across sessions)
+        fund_type_keys = {"Equity Funds": "equity", "Debt Funds": "debt", "Hybrid Funds": "hybrid"}
+        filtered = filter_schemes_by_type(fund_type_keys[fund_type])
         
         # Pagination
         page_num = st.number_input("Page:", min_value=1, value=1, step=1, key="browse_page")
@@ -529,19 +1162,9 @@ elif page == "🔎 Search Funds":
             end_idx = start_idx + items_per_page
             paginated = list(filtered.items())[start_idx:end_idx]
             
-            for code, name in paginated:
-                col1, col2, col3 = st.columns([3, 3, 1])
-                
-                with col1:
-                    st.write(f"**{name}**")
-                with col2:
-                    st.caption(f"Code: {code}")
-                with col3:
-                    if st.button("📌", key=f"type_select_{code}"):
-                        st.session_state.selected_schemes[code] = name
-                        st.success(f"Added: {name}")
-            else:
-                st.warning(f"Could not load {fund_type}")
+            render_scheme_picker(paginated, key="type_table")
+        else:
+            st.warning(f"Could not load {fund_type}")
     
     with tab4:
         st.subheader("Browse by Scheme Category")
@@ -578,28 +1201,17 @@ elif page == "🔎 Search Funds":
             key="scheme_category_select"
         )
         
-        # Filter schemes by category
-        category_schemes = {}
-        all_schemes = get_all_scheme_codes()
+        # Filter schemes by category - Growth/Regular plans without dividend/payout variants
+        idx = build_scheme_index()
+        category_mask = idx.is_growth & ~idx.excluded
         
-        for code, name in all_schemes.items():
-            if name and isinstance(name, str):
-                name_lower = name.lower()
-                # Skip dividend/payout variants - keep only Growth and Regular
-                exclude_patterns = ['dividend', 'idcw', 'monthly', 'quarterly', 'semi-annual', 'annual', 'payout', 'bonus', 'weekly', 'daily', 'fortnightly', 'direct', 'reinvestment', 'distribution', 'income option', 'plan b', 'plan c', 'institutional', 'withdrawl', 'fixed term', 'capital protection', 'fmp', 'ftp', 'series', 'nfo', 'maturity']
-                if any(x in name_lower for x in exclude_patterns):
-                    continue
-                
-                # Only accept if has 'growth' or 'regular'
-                if 'growth' not in name_lower and 'regular' not in name_lower:
-                    continue
-                
-                if selected_category == "All":
-                    category_schemes[code] = name
-                else:
-                    keywords = SCHEME_CATEGORIES[selected_category]["keywords"]
-                    if any(kw in name_lower for kw in keywords):
-                        category_schemes[code] = name
+        if selected_category != "All":
+            keyword_mask = np.zeros(len(idx.codes), dtype=bool)
+            for kw in SCHEME_CATEGORIES[selected_category]["keywords"]:
+                keyword_mask |= np.char.find(idx.names_lower, kw) >= 0
+            category_mask &= keyword_mask
+        
+        category_schemes = idx.select(category_mask)
         
         if category_schemes:
             st.success(f"Found {len(category_schemes)} schemes in {selected_category}")
@@ -612,17 +1224,7 @@ elif page == "🔎 Search Funds":
             end_idx = start_idx + items_per_page
             paginated = list(category_schemes.items())[start_idx:end_idx]
             
-            for code, name in paginated:
-                col1, col2, col3 = st.columns([3, 3, 1])
-                
-                with col1:
-                    st.write(f"**{name}**")
-                with col2:
-                    st.caption(f"Code: {code}")
-                with col3:
-                    if st.button("📌", key=f"cat_select_{code}"):
-                        st.session_state.selected_schemes[code] = name
-                        st.success(f"Added: {name}")
+            render_scheme_picker(paginated, key="category_table")
         else:
             st.warning(f"No schemes found in {selected_category}")
     st.subheader("📌 Selected Schemes")
@@ -640,7 +1242,7 @@ elif page == "🔎 Search Funds":
                     del st.session_state.selected_schemes[code]
                     st.rerun()
     else:
-        st.info("No schemes selected yet. Click 📌 to add schemes.")
+        st.info("No schemes selected yet. Select rows in the tables above to add schemes.")
 
 # =============================================================================
 # PAGE: ROLLING RETURNS
@@ -679,187 +1281,173 @@ elif page == "📊 Rolling Returns":
                 
                 st.markdown("---")
                 
-                # Period selection
-                period = st.select_slider(
-                    "Select Period:",
-                    options=["1Y", "3Y", "5Y", "7Y", "10Y", "15Y", "20Y"],
-                    value="5Y"
-                )
-                
-                period_days = DataProcessor.PERIODS[period]
-                
-                # Calculate rolling returns
-                rolling_returns = DataProcessor.calculate_rolling_returns(
-                    nav_df['nav'].iloc[::-1].reset_index(drop=True),
-                    period_days
-                )
-                
-                if rolling_returns is not None:
-                    stats = DataProcessor.calculate_statistics(rolling_returns)
-                    
-                    # Metrics
-                    col1, col2, col3, col4, col5 = st.columns(5)
-                    
-                    with col1:
-                        st.metric("Min Return", f"{stats['Min']:.2f}%")
-                    with col2:
-                        st.metric("Max Return", f"{stats['Max']:.2f}%")
-                    with col3:
-                        st.metric("Mean Return", f"{stats['Mean']:.2f}%")
-                    with col4:
-                        st.metric("Std Dev", f"{stats['Std Dev']:.2f}%")
-                    with col5:
-                        st.metric("Sharpe Ratio", f"{stats['Sharpe']:.2f}")
+                # Only this fragment reruns when the period slider changes; the quote above stays put
+                @st.fragment
+                def render_rolling_analysis():
+                    # Period selection
+                    period = st.select_slider(
+                        "Select Period:",
+                        options=["1Y", "3Y", "5Y", "7Y", "10Y", "15Y", "20Y"],
+                        value="5Y"
+                    )
                     
-                    st.markdown("---")
+                    # Calculate rolling returns
+                    nav_values, _ = clean_nav_array(selected_code)
+                    rolling_returns = get_rolling_returns(selected_code, period)
                     
-                    # Multiple charts in tabs
-                    chart_tab1, chart_tab2, chart_tab3, chart_tab4 = st.tabs(["📈 Rolling Returns", "📊 Distribution", "📉 Performance", "🔍 Volatility"])
+                    # NAV-derived series shared by the chart tabs and quant metrics
+                    daily_returns = pd.Series(np.diff(nav_values) / nav_values[:-1])
+                    cumulative_growth = (1 + daily_returns).cumprod()
+                    cum_returns = cumulative_growth - 1
+                    rolling_vol = daily_returns.rolling(window=30).std() * (252 ** 0.5) * 100
                     
-                    with chart_tab1:
-                        fig = go.Figure()
-                        fig.add_trace(go.Scatter(
-                            x=rolling_returns.index,
-                            y=rolling_returns.values,
-                            mode='lines',
-                            name=f'{period} Rolling Returns',
-                            line=dict(color='#667eea', width=2),
-                            fill='tozeroy'
-                        ))
+                    if rolling_returns is not None:
+                        stats = get_rolling_statistics(selected_code, period)
                         
-                        fig.update_layout(
-                            title=f'{period} Rolling CAGR Returns - {scheme_name}',
-                            xaxis_title='Date',
-                            yaxis_title='Return (%)',
-                            template='plotly_dark',
-                            height=450,
-                            hovermode='x unified'
-                        )
+                        # Metrics
+                        col1, col2, col3, col4, col5 = st.columns(5)
                         
-                        st.plotly_chart(fig, width='stretch')
-                    
-                    with chart_tab2:
-                        # Histogram
-                        fig2 = go.Figure()
-                        fig2.add_trace(go.Histogram(
-                            x=rolling_returns.values,
-                            nbinsx=50,
-                            name=f'{period} Returns',
-                            marker_color='#764ba2'
-                        ))
+                        with col1:
+                            st.metric("Min Return", f"{stats['Min']:.2f}%")
+                        with col2:
+                            st.metric("Max Return", f"{stats['Max']:.2f}%")
+                        with col3:
+                            st.metric("Mean Return", f"{stats['Mean']:.2f}%")
+                        with col4:
+                            st.metric("Std Dev", f"{stats['Std Dev']:.2f}%")
+                        with col5:
+                            st.metric("Sharpe Ratio", f"{stats['Sharpe']:.2f}")
                         
-                        fig2.update_layout(
-                            title=f'Return Distribution - {period}',
-                            xaxis_title='Return (%)',
-                            yaxis_title='Frequency',
-                            template='plotly_dark',
-                            height=450
-                        )
+                        st.markdown("---")
                         
-                        st.plotly_chart(fig2, width='stretch')
-                    
-                    with chart_tab3:
-                        # Cumulative returns
-                        nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                        nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
-                        daily_returns = nav_numeric.pct_change().dropna()
-                        cum_returns = (1 + daily_returns).cumprod() - 1
+                        # Multiple charts in tabs
+                        chart_tab1, chart_tab2, chart_tab3, chart_tab4 = st.tabs(["📈 Rolling Returns", "📊 Distribution", "📉 Performance", "🔍 Volatility"])
                         
-                        fig3 = go.Figure()
-                        fig3.add_trace(go.Scatter(
-                            y=(cum_returns.values * 100),
-                            mode='lines',
-                            name='Cumulative Return',
-                            line=dict(color='#00cc88', width=2),
-                            fill='tozeroy'
-                        ))
+                        with chart_tab1:
+                            fig = go.Figure()
+                            rr_pos, rr_values = downsample(rolling_returns.values)
+                            fig.add_trace(go.Scattergl(
+                                x=rolling_returns.index[rr_pos],
+                                y=rr_values.astype(np.float32, copy=False),
+                                mode='lines',
+                                name=f'{period} Rolling Returns',
+                                line=dict(color='#667eea', width=2),
+                                fill='tozeroy'
+                            ))
+                            
+                            fig.update_layout(
+                                title=f'{period} Rolling CAGR Returns - {scheme_name}',
+                                xaxis_title='Date',
+                                yaxis_title='Return (%)',
+                                template='plotly_dark',
+                                height=450,
+                                hovermode='x unified'
+                            )
+                            
+                            st.plotly_chart(fig, width='stretch')
                         
-                        fig3.update_layout(
-                            title=f'Cumulative Returns - {scheme_name}',
-                            yaxis_title='Cumulative Return (%)',
-                            template='plotly_dark',
-                            height=450,
-                            hovermode='x unified'
-                        )
+                        with chart_tab2:
+                            # Histogram
+                            fig2 = go.Figure()
+                            fig2.add_trace(go.Histogram(
+                                x=rolling_returns.values,
+                                nbinsx=50,
+                                name=f'{period} Returns',
+                                marker_color='#764ba2'
+                            ))
+                            
+                            fig2.update_layout(
+                                title=f'Return Distribution - {period}',
+                                xaxis_title='Return (%)',
+                                yaxis_title='Frequency',
+                                template='plotly_dark',
+                                height=450
+                            )
+                            
+                            st.plotly_chart(fig2, width='stretch')
                         
-                        st.plotly_chart(fig3, width='stretch')
-                    
-                    with chart_tab4:
-                        # Rolling volatility
-                        rolling_vol = daily_returns.rolling(window=30).std() * (252 ** 0.5) * 100
+                        with chart_tab3:
+                            # Cumulative returns
+                            fig3 = go.Figure()
+                            cum_pos, cum_values = downsample(cum_returns.values * 100)
+                            fig3.add_trace(go.Scattergl(
+                                x=cum_pos,
+                                y=cum_values.astype(np.float32, copy=False),
+                                mode='lines',
+                                name='Cumulative Return',
+                                line=dict(color='#00cc88', width=2),
+                                fill='tozeroy'
+                            ))
+                            
+                            fig3.update_layout(
+                                title=f'Cumulative Returns - {scheme_name}',
+                                yaxis_title='Cumulative Return (%)',
+                                template='plotly_dark',
+                                height=450,
+                                hovermode='x unified'
+                            )
+                            
+                            st.plotly_chart(fig3, width='stretch')
                         
-                        fig4 = go.Figure()
-                        fig4.add_trace(go.Scatter(
-                            y=rolling_vol.values,
-                            mode='lines',
-                            name='30-Day Rolling Volatility',
-                            line=dict(color='#ff6b6b', width=2),
-                            fill='tozeroy'
-                        ))
+                        with chart_tab4:
+                            # Rolling volatility
+                            fig4 = go.Figure()
+                            vol_pos, vol_values = downsample(rolling_vol.values)
+                            fig4.add_trace(go.Scattergl(
+                                x=vol_pos,
+                                y=vol_values.astype(np.float32, copy=False),
+                                mode='lines',
+                                name='30-Day Rolling Volatility',
+                                line=dict(color='#ff6b6b', width=2),
+                                fill='tozeroy'
+                            ))
+                            
+                            fig4.update_layout(
+                                title=f'30-Day Rolling Volatility (Annualized) - {scheme_name}',
+                                yaxis_title='Volatility (%)',
+                                template='plotly_dark',
+                                height=450,
+                                hovermode='x unified'
+                            )
+                            
+                            st.plotly_chart(fig4, width='stretch')
                         
-                        fig4.update_layout(
-                            title=f'30-Day Rolling Volatility (Annualized) - {scheme_name}',
-                            yaxis_title='Volatility (%)',
-                            template='plotly_dark',
-                            height=450,
-                            hovermode='x unified'
-                        )
+                        # Probability table
+                        st.subheader("Return Probability Analysis")
+                        prob_data = {
+                            'Range': ['Negative', '0-5%', '5-10%', '10-15%', '15-20%', '>20%'],
+                            'Probability': [
+                                f"{stats['Prob(Negative)']:.2f}%",
+                                f"{stats['Prob(0-5%)']:.2f}%",
+                                f"{stats['Prob(5-10%)']:.2f}%",
+                                f"{stats['Prob(10-15%)']:.2f}%",
+                                f"{stats['Prob(15-20%)']:.2f}%",
+                                f"{stats['Prob(>20%)']:.2f}%"
+                            ]
+                        }
                         
-                        st.plotly_chart(fig4, width='stretch')
-                    
-                    # Probability table
-                    st.subheader("Return Probability Analysis")
-                    prob_data = {
-                        'Range': ['Negative', '0-5%', '5-10%', '10-15%', '15-20%', '>20%'],
-                        'Probability': [
-                            f"{stats['Prob(Negative)']:.2f}%",
-                            f"{stats['Prob(0-5%)']:.2f}%",
-                            f"{stats['Prob(5-10%)']:.2f}%",
-                            f"{stats['Prob(10-15%)']:.2f}%",
-                            f"{stats['Prob(15-20%)']:.2f}%",
-                            f"{stats['Prob(>20%)']:.2f}%"
-                        ]
-                    }
-                    
-                    st.dataframe(pd.DataFrame(prob_data), width='stretch')
-                    
-                    # Advanced Quant Metrics
-                    st.subheader("📊 Advanced Quantitative Metrics")
-                    
-                    quant_col1, quant_col2, quant_col3, quant_col4 = st.columns(4)
-                    
-                    # Calculate additional metrics
-                    returns = rolling_returns.values
-                    downside_returns = returns[returns < 0]
-                    
-                    # Sortino Ratio (like Sharpe but only counts downside)
-                    if len(downside_returns) > 0:
-                        downside_std = np.std(downside_returns)
-                        sortino = (np.mean(returns) / downside_std * np.sqrt(252)) if downside_std > 0 else 0
+                        st.dataframe(pd.DataFrame(prob_data), width='stretch')
+                        
+                        # Advanced Quant Metrics
+                        st.subheader("📊 Advanced Quantitative Metrics")
+                        
+                        quant_col1, quant_col2, quant_col3, quant_col4 = st.columns(4)
+                        
+                        # Calculate additional metrics
+                        quant = DataProcessor.quant_summary(rolling_returns.values, cumulative_growth)
+                        
+                        with quant_col1:
+                            st.metric("Sortino Ratio", f"{quant['Sortino']:.2f}")
+                        with quant_col2:
+                            st.metric("Calmar Ratio", f"{quant['Calmar']:.2f}")
+                        with quant_col3:
+                            st.metric("Win Rate", f"{quant['Win Rate']:.1f}%")
+                        with quant_col4:
+                            st.metric("Max Drawdown", f"{quant['Max Drawdown']:.2f}%")
                     else:
-                        sortino = np.inf if np.mean(returns) > 0 else 0
-                    
-                    # Calmar Ratio (return / max drawdown)
-                    cumulative_returns = (1 + nav_numeric.pct_change().dropna()).cumprod()
-                    running_max = cumulative_returns.cummax()
-                    drawdown = (cumulative_returns - running_max) / running_max
-                    max_dd = drawdown.min()
-                    annual_return_pct = np.mean(returns)
-                    calmar = abs(annual_return_pct / max_dd) if max_dd != 0 else 0
-                    
-                    # Win Rate
-                    win_rate = (len(returns[returns > 0]) / len(returns) * 100) if len(returns) > 0 else 0
-                    
-                    with quant_col1:
-                        st.metric("Sortino Ratio", f"{sortino:.2f}")
-                    with quant_col2:
-                        st.metric("Calmar Ratio", f"{calmar:.2f}")
-                    with quant_col3:
-                        st.metric("Win Rate", f"{win_rate:.1f}%")
-                    with quant_col4:
-                        st.metric("Max Drawdown", f"{max_dd*100:.2f}%")
-                else:
-                    st.warning(f"Not enough data for {period} analysis")
+                        st.warning(f"Not enough data for {period} analysis")
+                
+                render_rolling_analysis()
             else:
                 st.error(f"Could not fetch historical data for scheme {selected_code}")
 
@@ -881,50 +1469,81 @@ elif page == "🔄 Compare":
         )
         
         if len(compare_codes) >= 2:
-            comparison_data = []
+            compare_details = get_details_batch(compare_codes)
             
+            # Collect the table column by column
+            names, codes, navs, updated, fund_houses, categories = [], [], [], [], [], []
             for code in compare_codes:
                 quote = get_scheme_quote(code)
-                details = get_scheme_details(code)
+                details = compare_details.get(code)
                 
                 if quote:
-                    row = {
-                        'Scheme': st.session_state.selected_schemes[code],
-                        'Code': code,
-                        'Current NAV': quote.get('nav', 'N/A'),
-                        'Last Updated': quote.get('last_updated', 'N/A'),
-                    }
+                    names.append(st.session_state.selected_schemes[code])
+                    codes.append(code)
+                    navs.append(quote.get('nav', 'N/A'))
+                    updated.append(quote.get('last_updated', 'N/A'))
+                    fund_houses.append(details.get('fund_house', 'N/A') if details else None)
+                    categories.append(details.get('scheme_category', 'N/A') if details else None)
+            
+            if names:
+                comparison_table = {
+                    'Scheme': names,
+                    'Code': codes,
+                    'Current NAV': navs,
+                    'Last Updated': updated,
+                }
+                if any(house is not None for house in fund_houses):
+                    comparison_table['Fund House'] = fund_houses
+                    comparison_table['Category'] = categories
+                
+                st.dataframe(pd.DataFrame(comparison_table), width='stretch')
+                
+                # Fetch NAV history for all compared schemes in parallel
+                get_navs_batch(compare_codes)
+                
+                # Precompute every series and metric once per scheme for the charts and tables below
+                per_scheme = {}
+                for code in compare_codes:
+                    nav_values, _ = clean_nav_array(code)
+                    if len(nav_values) < 2:
+                        continue
                     
-                    if details:
-                        row['Fund House'] = details.get('fund_house', 'N/A')
-                        row['Category'] = details.get('scheme_category', 'N/A')
+                    # One chronological daily return series feeds every chart and metric
+                    returns = np.diff(nav_values) / nav_values[:-1]
+                    growth = np.cumprod(1 + returns)
                     
-                    comparison_data.append(row)
-            
-            if comparison_data:
-                st.dataframe(pd.DataFrame(comparison_data), width='stretch')
+                    annual_return = returns.mean() * 252 * 100  # Annualized return
+                    annual_volatility = returns.std(ddof=1) * (252 ** 0.5) * 100  # Annualized volatility
+                    
+                    downside_returns = returns[returns < 0]
+                    downside_std = np.std(downside_returns) if len(downside_returns) > 0 else 0
+                    
+                    per_scheme[code] = {
+                        'name': st.session_state.selected_schemes[code],
+                        'normalized': nav_values / nav_values[0] * 100 if nav_values[0] > 0 else None,
+                        'cum_returns': growth - 1,
+                        'returns': returns,
+                        'return': annual_return,
+                        'volatility': annual_volatility,
+                        'sharpe': annual_return / annual_volatility if annual_volatility > 0 else 0,
+                        'sortino': (returns.mean() * 252) / (downside_std * np.sqrt(252)) if downside_std > 0 else 0,
+                        'max_dd': DataProcessor.calculate_drawdown(growth),
+                        'win_rate': np.count_nonzero(returns > 0) / len(returns) * 100,
+                    }
                 
                 # NAV Comparison Chart
                 st.subheader("NAV Comparison (Last 1 Year)")
                 
                 fig = go.Figure()
                 
-                for code in compare_codes:
-                    nav_df = get_scheme_historical_nav(code)
-                    
-                    if nav_df is not None:
-                        # Normalize NAV to 100 on first day - convert to numeric first
-                        nav_series = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                        nav_series = nav_series.iloc[::-1].reset_index(drop=True)
-                        
-                        if len(nav_series) > 0 and nav_series.iloc[0] > 0:
-                            normalized = (nav_series / nav_series.iloc[0]) * 100
-                            
-                            fig.add_trace(go.Scatter(
-                                y=normalized.values[-252:] if len(normalized) > 252 else normalized.values,
-                                name=st.session_state.selected_schemes[code],
-                                mode='lines'
-                            ))
+                for scheme in per_scheme.values():
+                    # Normalized to 100 on first day
+                    if scheme['normalized'] is not None:
+                        fig.add_trace(go.Scattergl(
+                            y=scheme['normalized'][-252:].astype(np.float32, copy=False),
+                            name=scheme['name'],
+                            mode='lines'
+                        ))
                 
                 fig.update_layout(
                     title="NAV Performance (Indexed to 100)",
@@ -947,15 +1566,23 @@ elif page == "🔄 Compare":
                     
                     fig_dist = go.Figure()
                     
-                    for code in compare_codes:
-                        nav_df = get_scheme_historical_nav(code)
-                        if nav_df is not None:
-                            nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                            returns = nav_numeric.pct_change().dropna() * 100  # Convert to percentage
-                            
-                            fig_dist.add_trace(go.Histogram(
-                                x=returns.values,
-                                name=st.session_state.selected_schemes[code],
+                    # Bin server-side on edges shared by every scheme so only counts reach the browser;
+                    # a zero NAV gives an infinite return, which (like go.Histogram) is left out
+                    finite_returns = {
+                        code: scheme['returns'][np.isfinite(scheme['returns'])] * 100  # Convert to percentage
+                        for code, scheme in per_scheme.items()
+                    }
+                    if any(len(returns) for returns in finite_returns.values()):
+                        bin_edges = np.histogram_bin_edges(np.concatenate(list(finite_returns.values())), bins=50)
+                        bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2
+                        
+                        for code, scheme in per_scheme.items():
+                            counts, _ = np.histogram(finite_returns[code], bins=bin_edges)
+                            fig_dist.add_trace(go.Bar(
+                                x=bin_centers,
+                                y=counts,
+                                width=bin_edges[1] - bin_edges[0],
+                                name=scheme['name'],
                                 opacity=0.7
                             ))
                     
@@ -965,7 +1592,8 @@ elif page == "🔄 Compare":
                         yaxis_title="Frequency",
                         template='plotly_dark',
                         height=400,
-                        barmode='overlay'
+                        barmode='overlay',
+                        bargap=0
                     )
                     
                     st.plotly_chart(fig_dist, width='stretch')
@@ -976,20 +1604,13 @@ elif page == "🔄 Compare":
                     
                     fig_cum = go.Figure()
                     
-                    for code in compare_codes:
-                        nav_df = get_scheme_historical_nav(code)
-                        if nav_df is not None:
-                            nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                            nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
-                            returns = nav_numeric.pct_change().dropna()
-                            cum_returns = (1 + returns).cumprod() - 1
-                            
-                            fig_cum.add_trace(go.Scatter(
-                                y=(cum_returns.values * 100)[-252:] if len(cum_returns) > 252 else (cum_returns.values * 100),
-                                name=st.session_state.selected_schemes[code],
-                                mode='lines',
-                                fill='tozeroy'
-                            ))
+                    for scheme in per_scheme.values():
+                        fig_cum.add_trace(go.Scattergl(
+                            y=(scheme['cum_returns'] * 100)[-252:].astype(np.float32, copy=False),
+                            name=scheme['name'],
+                            mode='lines',
+                            fill='tozeroy'
+                        ))
                     
                     fig_cum.update_layout(
                         title="Cumulative Returns (%)",
@@ -1006,26 +1627,15 @@ elif page == "🔄 Compare":
                 
                 fig_scatter = go.Figure()
                 
-                risk_return_data = []
-                
-                for code in compare_codes:
-                    nav_df = get_scheme_historical_nav(code)
-                    if nav_df is not None:
-                        nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                        returns = nav_numeric.pct_change().dropna()
-                        
-                        annual_return = (returns.mean() * 252) * 100  # Annualized return
-                        annual_volatility = returns.std() * (252 ** 0.5) * 100  # Annualized volatility
-                        
-                        risk_return_data.append({
-                            'scheme': st.session_state.selected_schemes[code],
-                            'return': annual_return,
-                            'volatility': annual_volatility,
-                            'sharpe': annual_return / annual_volatility if annual_volatility > 0 else 0
-                        })
+                schemes = list(per_scheme.values())
+                df_rr = pd.DataFrame({
+                    'scheme': [scheme['name'] for scheme in schemes],
+                    'return': [scheme['return'] for scheme in schemes],
+                    'volatility': [scheme['volatility'] for scheme in schemes],
+                    'sharpe': [scheme['sharpe'] for scheme in schemes]
+                })
                 
-                if risk_return_data:
-                    df_rr = pd.DataFrame(risk_return_data)
+                if not df_rr.empty:
                     
                     fig_scatter = go.Figure(data=[go.Scatter(
                         x=df_rr['volatility'],
@@ -1056,40 +1666,18 @@ elif page == "🔄 Compare":
                     # Risk-Return metrics table with advanced quant metrics
                     st.subheader("Comparative Metrics")
                     
-                    # Add advanced quant metrics to comparison
-                    quant_metrics = []
-                    
-                    for code in compare_codes:
-                        nav_df = get_scheme_historical_nav(code)
-                        if nav_df is not None:
-                            nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                            returns = nav_numeric.pct_change().dropna()
-                            
-                            # Sortino Ratio
-                            downside_returns = returns[returns < 0]
-                            downside_std = np.std(downside_returns) if len(downside_returns) > 0 else 0
-                            sortino = (np.mean(returns) * 252) / (downside_std * np.sqrt(252)) if downside_std > 0 else 0
-                            
-                            # Max Drawdown
-                            cumulative = (1 + returns).cumprod()
-                            running_max = cumulative.cummax()
-                            drawdown = (cumulative - running_max) / running_max
-                            max_dd = drawdown.min() * 100
-                            
-                            # Win Rate
-                            win_rate = (len(returns[returns > 0]) / len(returns) * 100) if len(returns) > 0 else 0
-                            
-                            quant_metrics.append({
-                                'Scheme': st.session_state.selected_schemes[code],
-                                'Return %': f"{df_rr[df_rr['scheme'] == st.session_state.selected_schemes[code]]['return'].values[0]:.2f}",
-                                'Volatility %': f"{df_rr[df_rr['scheme'] == st.session_state.selected_schemes[code]]['volatility'].values[0]:.2f}",
-                                'Sharpe': f"{df_rr[df_rr['scheme'] == st.session_state.selected_schemes[code]]['sharpe'].values[0]:.2f}",
-                                'Sortino': f"{sortino:.2f}",
-                                'Max DD %': f"{max_dd:.2f}",
-                                'Win Rate %': f"{win_rate:.1f}"
-                            })
+                    # Add advanced quant metrics to comparison, formatting each column in one vectorized call
+                    quant_metrics = pd.DataFrame({
+                        'Scheme': df_rr['scheme'],
+                        'Return %': np.char.mod('%.2f', df_rr['return'].to_numpy()),
+                        'Volatility %': np.char.mod('%.2f', df_rr['volatility'].to_numpy()),
+                        'Sharpe': np.char.mod('%.2f', df_rr['sharpe'].to_numpy()),
+                        'Sortino': np.char.mod('%.2f', np.array([scheme['sortino'] for scheme in schemes], dtype=np.float64)),
+                        'Max DD %': np.char.mod('%.2f', np.array([scheme['max_dd'] for scheme in schemes], dtype=np.float64)),
+                        'Win Rate %': np.char.mod('%.1f', np.array([scheme['win_rate'] for scheme in schemes], dtype=np.float64))
+                    })
                     
-                    st.dataframe(pd.DataFrame(quant_metrics), width='stretch')
+                    st.dataframe(quant_metrics, width='stretch')
 
 # =============================================================================
 # PAGE: PORTFOLIO
@@ -1124,80 +1712,91 @@ elif page == "💼 Portfolio":
         st.markdown("---")
         
         if portfolio_type != "Custom":
-            # Pre-defined portfolios
-            with st.spinner("Loading funds for selected portfolio type..."):
-                if "Conservative" in portfolio_type:
-                    debt_schemes = filter_schemes_by_type("debt")
-                    equity_schemes = filter_schemes_by_type("equity")
-                    
-                    if debt_schemes and equity_schemes:
-                        # Pick best from each
-                        debt_list = list(debt_schemes.items())[:3]
-                        equity_list = list(equity_schemes.items())[:1]
-                        
-                        portfolio_allocation = {}
-                        for code, name in debt_list:
-                            portfolio_allocation[code] = 26.67  # 80% / 3
-                        for code, name in equity_list:
-                            portfolio_allocation[code] = 20.0
-                        
-                        st.session_state.selected_schemes.update(dict(debt_list + equity_list))
+            # Pre-defined portfolios - applied once per choice so later reruns keep the user's edits
+            # (and do not re-add schemes removed from the selection)
+            if st.session_state.get('applied_portfolio_type') != portfolio_type:
+                portfolio_allocation = {}
                 
-                elif "Balanced" in portfolio_type:
-                    debt_schemes = filter_schemes_by_type("debt")
-                    equity_schemes = filter_schemes_by_type("equity")
-                    
-                    if debt_schemes and equity_schemes:
-                        debt_list = list(debt_schemes.items())[:2]
-                        equity_list = list(equity_schemes.items())[:2]
-                        
-                        portfolio_allocation = {}
-                        for code, name in equity_list:
-                            portfolio_allocation[code] = 30.0  # 60% / 2
-                        for code, name in debt_list:
-                            portfolio_allocation[code] = 20.0  # 40% / 2
+                with st.spinner("Loading funds for selected portfolio type..."):
+                    if "Conservative" in portfolio_type:
+                        debt_schemes = filter_schemes_by_type("debt")
+                        equity_schemes = filter_schemes_by_type("equity")
                         
-                        st.session_state.selected_schemes.update(dict(debt_list + equity_list))
-                
-                elif "Aggressive" in portfolio_type:
-                    equity_schemes = filter_schemes_by_type("equity")
-                    debt_schemes = filter_schemes_by_type("debt")
+                        if debt_schemes and equity_schemes:
+                            # Pick best from each
+                            debt_list = list(islice(debt_schemes.items(), 3))
+                            equity_list = list(islice(equity_schemes.items(), 1))
+                            
+                            portfolio_allocation = {code: 26.67 for code, _ in debt_list} | {code: 20.0 for code, _ in equity_list}  # 80% / 3, 20%
+                            
+                            st.session_state.selected_schemes.update(debt_list)
+                            st.session_state.selected_schemes.update(equity_list)
                     
-                    if equity_schemes and debt_schemes:
-                        equity_list = list(equity_schemes.items())[:3]
-                        debt_list = list(debt_schemes.items())[:1]
+                    elif "Balanced" in portfolio_type:
+                        debt_schemes = filter_schemes_by_type("debt")
+                        equity_schemes = filter_schemes_by_type("equity")
                         
-                        portfolio_allocation = {}
-                        for code, name in equity_list:
-                            portfolio_allocation[code] = 26.67  # 80% / 3
-                        for code, name in debt_list:
-                            portfolio_allocation[code] = 20.0
+                        if debt_schemes and equity_schemes:
+                            debt_list = list(islice(debt_schemes.items(), 2))
+                            equity_list = list(islice(equity_schemes.items(), 2))
+                            
+                            portfolio_allocation = {code: 30.0 for code, _ in equity_list} | {code: 20.0 for code, _ in debt_list}  # 60% / 2, 40% / 2
+                            
+                            st.session_state.selected_schemes.update(debt_list)
+                            st.session_state.selected_schemes.update(equity_list)
+                    
+                    elif "Aggressive" in portfolio_type:
+                        equity_schemes = filter_schemes_by_type("equity")
+                        debt_schemes = filter_schemes_by_type("debt")
                         
-                        st.session_state.selected_schemes.update(dict(equity_list + debt_list))
+                        if equity_schemes and debt_schemes:
+                            equity_list = list(islice(equity_schemes.items(), 3))
+                            debt_list = list(islice(debt_schemes.items(), 1))
+                            
+                            portfolio_allocation = {code: 26.67 for code, _ in equity_list} | {code: 20.0 for code, _ in debt_list}  # 80% / 3, 20%
+                            
+                            st.session_state.selected_schemes.update(equity_list)
+                            st.session_state.selected_schemes.update(debt_list)
+                
+                st.session_state.applied_portfolio_type = portfolio_type
+                st.session_state.portfolio_allocation = portfolio_allocation
+            
+            portfolio_allocation = st.session_state.get('portfolio_allocation', {})
         else:
+            st.session_state.applied_portfolio_type = None
             portfolio_allocation = {}
         
+        # Snapshot the selection once (after any preset above) for every tab below
+        portfolio_codes = tuple(st.session_state.selected_schemes)
+        portfolio_names = [st.session_state.selected_schemes[code] for code in portfolio_codes]
+        
         st.markdown("---")
         st.subheader("Manual Portfolio Configuration")
         
-        if st.session_state.selected_schemes:
-            weights = {}
-            total_weight = 0
-            
-            col1, col2 = st.columns([3, 1])
+        weights = {}
+        
+        if portfolio_codes:
+            # Sliders sit in a form so dragging them does not rerun the page; the values
+            # below are the last submitted ones and are shared with the other tabs
+            with st.form("portfolio_weights"):
+                col1, col2 = st.columns([3, 1])
+                default_weight = int(100 / len(portfolio_codes))
+                
+                for code, name in zip(portfolio_codes, portfolio_names):
+                    with col1:
+                        weight = st.slider(
+                            f"{name}",
+                            min_value=0,
+                            max_value=100,
+                            value=int(portfolio_allocation.get(code, default_weight)),
+                            step=1,
+                            key=f"weight_{code}"
+                        )
+                    weights[code] = weight
+                
+                analyze_clicked = st.form_submit_button("📊 Analyze Portfolio", key="analyze_portfolio")
             
-            for code, name in st.session_state.selected_schemes.items():
-                with col1:
-                    weight = st.slider(
-                        f"{name}",
-                        min_value=0,
-                        max_value=100,
-                        value=int(portfolio_allocation.get(code, 100 / len(st.session_state.selected_schemes))),
-                        step=1,
-                        key=f"weight_{code}"
-                    )
-                weights[code] = weight
-                total_weight += weight
+            total_weight = sum(weights.values())
             
             # Status indicator
             if total_weight == 100:
@@ -1207,37 +1806,53 @@ elif page == "💼 Portfolio":
             
             st.markdown("---")
             
-            if total_weight == 100 and st.button("📊 Analyze Portfolio", key="analyze_portfolio"):
+            # Results are kept in session state so later reruns (tab switches, other widgets)
+            # keep showing them until the weights or amount change
+            analysis_key = (tuple(weights.items()), investment_amount)
+            
+            if total_weight == 100 and analyze_clicked:
                 st.success("Portfolio weights are valid!")
                 
-                portfolio_data = []
-                total_weighted_nav = 0
-                allocation_amount = {}
+                portfolio_quotes = get_quotes_batch(weights.keys())
                 
-                for code, weight in weights.items():
-                    quote = get_scheme_quote(code)
-                    if quote:
-                        nav = float(quote.get('nav', 0))
-                        allocation = (weight / 100) * investment_amount
-                        units = allocation / nav
-                        weighted_nav = (weight / 100) * nav
-                        total_weighted_nav += weighted_nav
-                        
-                        allocation_amount[code] = {
-                            'allocation': allocation,
-                            'units': units,
-                            'nav': nav
-                        }
-                        
-                        portfolio_data.append({
-                            'Scheme': st.session_state.selected_schemes[code],
-                            'Allocation %': f"{weight}%",
-                            'Amount': f"₹{allocation:,.0f}",
-                            'Current NAV': f"₹{nav:.2f}",
-                            'Units': f"{units:,.2f}"
-                        })
+                # Derive every column for the quoted schemes at once from parallel arrays
+                quoted_codes = [code for code in weights if portfolio_quotes.get(code)]
+                weight_arr = np.array([weights[code] for code in quoted_codes], dtype=np.float64) / 100
+                nav_arr = np.array([float(portfolio_quotes[code].get('nav', 0)) for code in quoted_codes], dtype=np.float64)
+                alloc_arr = weight_arr * investment_amount
+                units_arr = np.divide(alloc_arr, nav_arr, out=np.zeros_like(alloc_arr), where=nav_arr > 0)
                 
-                st.dataframe(pd.DataFrame(portfolio_data), width='stretch')
+                st.session_state.portfolio_analysis = {
+                    'key': analysis_key,
+                    'codes': quoted_codes,
+                    'portfolio_data': pd.DataFrame({
+                        'Scheme': [st.session_state.selected_schemes[code] for code in quoted_codes],
+                        'Allocation %': [weights[code] for code in quoted_codes],
+                        'Amount': alloc_arr,
+                        'Current NAV': nav_arr,
+                        'Units': units_arr
+                    }),
+                    'alloc': alloc_arr,
+                    'units': units_arr,
+                    'total_weighted_nav': float(weight_arr @ nav_arr)
+                }
+            
+            analysis = st.session_state.get('portfolio_analysis')
+            if total_weight == 100 and analysis is not None and analysis['key'] == analysis_key:
+                quoted_codes = analysis['codes']
+                alloc_arr = analysis['alloc']
+                units_arr = analysis['units']
+                total_weighted_nav = analysis['total_weighted_nav']
+                
+                st.dataframe(
+                    analysis['portfolio_data'].style.format({
+                        'Allocation %': '{}%',
+                        'Amount': '₹{:,.0f}',
+                        'Current NAV': '₹{:.2f}',
+                        'Units': '{:,.2f}'
+                    }),
+                    width='stretch'
+                )
                 
                 # Metrics row
                 col1, col2, col3, col4 = st.columns(4)
@@ -1246,103 +1861,77 @@ elif page == "💼 Portfolio":
                 with col2:
                     st.metric("Total Investment", f"₹{investment_amount:,.0f}")
                 with col3:
-                    st.metric("Total Units", f"{sum(x['units'] for x in allocation_amount.values()):,.2f}")
+                    st.metric("Total Units", f"{units_arr.sum():,.2f}")
                 with col4:
                     avg_nav = total_weighted_nav
                     st.metric("Weighted Avg NAV", f"₹{avg_nav:.2f}")
                 
-                # Enhanced visualization - Allocation bar chart
-                st.subheader("Allocation Breakdown (₹)")
-                allocation_amounts = [allocation_amount[code]['allocation'] for code in weights.keys()]
-                scheme_names = [st.session_state.selected_schemes[code][:30] + "..." if len(st.session_state.selected_schemes[code]) > 30 else st.session_state.selected_schemes[code] for code in weights.keys()]
+                # Enhanced visualization - allocation and units side by side in one figure
+                st.subheader("Allocation Breakdown")
+                # Truncate long names once for both charts
+                full_names = analysis['portfolio_data']['Scheme']
+                scheme_names = (full_names.str.slice(0, 30) + "...").where(full_names.str.len() > 30, full_names).tolist()
                 
-                fig_alloc = go.Figure(data=[
-                    go.Bar(x=scheme_names, y=allocation_amounts, text=[f"₹{x:,.0f}" for x in allocation_amounts], textposition='outside')
-                ])
+                fig_alloc = make_subplots(rows=1, cols=2, subplot_titles=("Investment Amount per Scheme", "Total Units Allocation"))
+                fig_alloc.add_trace(
+                    go.Bar(x=scheme_names, y=alloc_arr, texttemplate="₹%{y:,.0f}", textposition='outside'),
+                    row=1, col=1
+                )
+                fig_alloc.add_trace(
+                    go.Bar(x=scheme_names, y=units_arr, texttemplate="%{y:,.2f}", textposition='outside', marker_color='#00cc88'),
+                    row=1, col=2
+                )
+                fig_alloc.update_yaxes(title_text="Amount (₹)", row=1, col=1)
+                fig_alloc.update_yaxes(title_text="Units", row=1, col=2)
                 fig_alloc.update_layout(
-                    title="Investment Amount per Scheme",
-                    yaxis_title="Amount (₹)",
                     template='plotly_dark',
-                    height=400,
+                    height=450,
                     showlegend=False
                 )
                 st.plotly_chart(fig_alloc, width='stretch')
-                
-                # Units comparison chart
-                st.subheader("Units per Scheme")
-                units_list = [allocation_amount[code]['units'] for code in weights.keys()]
-                
-                fig_units = go.Figure(data=[
-                    go.Bar(x=scheme_names, y=units_list, text=[f"{x:,.2f}" for x in units_list], textposition='outside', marker_color='#00cc88')
-                ])
-                fig_units.update_layout(
-                    title="Total Units Allocation",
-                    yaxis_title="Units",
-                    template='plotly_dark',
-                    height=400,
-                    showlegend=False
-                )
-                st.plotly_chart(fig_units, width='stretch')
         else:
             st.info("👈 Select schemes from 'Search Funds' page first")
+        
+        # Published for the other tabs so they never depend on tab1's locals
+        st.session_state.portfolio_weight_map = weights
+        st.session_state.portfolio_total_weight = sum(weights.values())
     
     with tab2:
         st.subheader("Asset Allocation Strategy")
         
-        if st.session_state.selected_schemes and total_weight == 100:
+        weights = st.session_state.get('portfolio_weight_map', {})
+        total_weight = st.session_state.get('portfolio_total_weight', 0)
+        
+        if portfolio_codes and total_weight == 100:
             col1, col2 = st.columns(2)
             
-            # Pie chart
-            allocation_values = [weights.get(code, 0) for code in st.session_state.selected_schemes.keys()]
-            allocation_labels = [st.session_state.selected_schemes[code] for code in st.session_state.selected_schemes.keys()]
+            # Pie chart and sunburst for detailed breakdown, rebuilt only when the allocation changes
+            fig_pie, fig_sun = build_allocation_figures(
+                tuple(portfolio_names),
+                tuple(weights.get(code, 0) for code in portfolio_codes)
+            )
             
             with col1:
-                fig_pie = go.Figure(data=[go.Pie(
-                    labels=allocation_labels,
-                    values=allocation_values,
-                    marker=dict(line=dict(color='#1f1f1f', width=2))
-                )])
-                
-                fig_pie.update_layout(
-                    title="Portfolio Allocation (%)",
-                    height=500,
-                    template='plotly_dark'
-                )
-                
                 st.plotly_chart(fig_pie, width='stretch')
             
-            # Sunburst chart for detailed breakdown
             with col2:
-                fig_sun = go.Figure(data=[go.Sunburst(
-                    labels=["Portfolio"] + allocation_labels,
-                    parents=[""] + ["Portfolio"] * len(allocation_labels),
-                    values=[100] + allocation_values,
-                    marker=dict(line=dict(color='#1f1f1f', width=2))
-                )])
-                
-                fig_sun.update_layout(
-                    title="Hierarchical Allocation",
-                    height=500,
-                    template='plotly_dark'
-                )
-                
                 st.plotly_chart(fig_sun, width='stretch')
             
             # Category-wise breakdown
             st.subheader("Category Breakdown")
             
-            equity_weight = 0
-            debt_weight = 0
-            hybrid_weight = 0
+            # Sum weights per asset class in one bincount; unclassified schemes (-1) are left out
+            asset_classes = ['equity', 'debt', 'hybrid']
+            class_idx = np.array([
+                asset_classes.index(asset_class) if asset_class is not None else -1
+                for asset_class in map(classify_scheme, portfolio_names)
+            ], dtype=np.intp)
+            weight_arr = np.array([weights.get(code, 0) for code in portfolio_codes], dtype=np.float64)
+            classified = class_idx >= 0
             
-            for code, weight in weights.items():
-                name_lower = st.session_state.selected_schemes[code].lower()
-                if any(x in name_lower for x in ['equity', 'large cap', 'mid cap', 'small cap', 'multi cap', 'flexi cap']):
-                    equity_weight += weight
-                elif any(x in name_lower for x in ['debt', 'bond', 'banking', 'psu', 'credit', 'liquid']):
-                    debt_weight += weight
-                elif any(x in name_lower for x in ['hybrid', 'balanced', 'allocation']):
-                    hybrid_weight += weight
+            equity_weight, debt_weight, hybrid_weight = np.bincount(
+                class_idx[classified], weights=weight_arr[classified], minlength=len(asset_classes)
+            ).tolist()
             
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -1353,56 +1942,43 @@ elif page == "💼 Portfolio":
                 st.metric("Hybrid Allocation", f"{hybrid_weight:.1f}%")
             
             # Category distribution chart
-            category_data = [equity_weight, debt_weight, hybrid_weight]
-            category_labels = ['Equity', 'Debt', 'Hybrid']
-            
-            fig_cat = go.Figure(data=[
-                go.Bar(x=category_labels, y=category_data, text=[f"{x:.1f}%" for x in category_data], textposition='outside',
-                       marker_color=['#667eea', '#ff6b6b', '#ffd93d'])
-            ])
-            fig_cat.update_layout(
-                title="Asset Class Allocation",
-                yaxis_title="Allocation (%)",
-                template='plotly_dark',
-                height=400,
-                showlegend=False
-            )
-            st.plotly_chart(fig_cat, width='stretch')
+            st.plotly_chart(build_category_figure((equity_weight, debt_weight, hybrid_weight)), width='stretch')
         else:
             st.info("Create a portfolio with 100% allocation to view asset allocation chart")
     
     with tab3:
         st.subheader("Portfolio Performance Analysis")
         
-        if st.session_state.selected_schemes and total_weight == 100:
+        weights = st.session_state.get('portfolio_weight_map', {})
+        total_weight = st.session_state.get('portfolio_total_weight', 0)
+        
+        if portfolio_codes and total_weight == 100:
             # Get NAV history for each scheme
-            portfolio_nav_history = {}
-            
-            for code in st.session_state.selected_schemes.keys():
-                nav_df = get_scheme_historical_nav(code)
-                if nav_df is not None:
-                    portfolio_nav_history[code] = nav_df
+            portfolio_nav_history = {
+                code: nav_df
+                for code, nav_df in get_navs_batch(portfolio_codes).items()
+                if nav_df is not None
+            }
             
             if portfolio_nav_history:
-                # Calculate portfolio NAV over time
-                combined_nav = None
+                # Calculate portfolio NAV over time - align every scheme on real dates, then one weighted matmul
+                nav_columns = {}
+                for code in portfolio_nav_history:
+                    nav_values, nav_dates = clean_nav_array(code)
+                    unique = ~nav_dates.duplicated(keep='last')
+                    nav_columns[code] = pd.Series(nav_values[unique], index=nav_dates[unique])
                 
-                for code, nav_df in portfolio_nav_history.items():
-                    weight = weights.get(code, 0) / 100
-                    nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce')
-                    
-                    if combined_nav is None:
-                        combined_nav = nav_numeric * weight
-                    else:
-                        # Align dates
-                        aligned = nav_numeric * weight
-                        combined_nav = combined_nav.add(aligned, fill_value=0)
+                nav_matrix = pd.concat(nav_columns, axis=1).sort_index().fillna(0.0)
+                weight_vector = np.array([weights.get(code, 0) / 100 for code in nav_matrix.columns], dtype=np.float64)
+                combined_nav = pd.Series(nav_matrix.to_numpy() @ weight_vector, index=nav_matrix.index)
                 
-                if combined_nav is not None:
-                    # Plot
+                if len(combined_nav) > 0:
+                    # Plot the trailing year against its real dates
+                    nav_tail = combined_nav.tail(252)
                     fig = go.Figure()
                     fig.add_trace(go.Scatter(
-                        y=combined_nav.values[-252:] if len(combined_nav) > 252 else combined_nav.values,
+                        x=nav_tail.index,
+                        y=nav_tail.to_numpy().astype(np.float32, copy=False),
                         mode='lines',
                         name='Portfolio NAV',
                         line=dict(color='#667eea', width=2)
@@ -1459,24 +2035,7 @@ elif page == "🤖 Auto Portfolio":
             help="How long you plan to stay invested"
         )
     
-    # Risk profile allocation mappings
-    risk_allocations = {
-        "Conservative": {"equity": 20, "debt": 80, "hybrid": 0},
-        "Moderate": {"equity": 35, "debt": 60, "hybrid": 5},
-        "Balanced": {"equity": 50, "debt": 40, "hybrid": 10},
-        "Aggressive": {"equity": 70, "debt": 20, "hybrid": 10},
-        "Very Aggressive": {"equity": 85, "debt": 10, "hybrid": 5}
-    }
-    
-    equity_subcats = {
-        "Conservative": ["Large Cap"],
-        "Moderate": ["Large Cap", "Multi Cap"],
-        "Balanced": ["Large Cap", "Multi Cap", "Mid Cap"],
-        "Aggressive": ["Mid Cap", "Multi Cap", "Small Cap"],
-        "Very Aggressive": ["Small Cap", "Mid Cap", "Focused", "Sectoral"]
-    }
-    
-    allocation = risk_allocations[risk_profile]
+    allocation = RISK_ALLOCATIONS[risk_profile]
     
     # Display allocation breakdown
     col1, col2, col3, col4 = st.columns(4)
@@ -1493,12 +2052,11 @@ elif page == "🤖 Auto Portfolio":
         with st.spinner("Analyzing funds and building your portfolio..."):
             try:
                 # Fetch funds by type
-                equity_schemes = filter_schemes_by_type("equity")
-                debt_schemes = filter_schemes_by_type("debt")
-                hybrid_schemes = filter_schemes_by_type("hybrid")
+                equity_schemes, debt_schemes, hybrid_schemes = get_scheme_universe()
                 
                 portfolio_funds = []
                 selected_codes = set()
+                type_counts = Counter()
                 
                 # Calculate funds needed from each category
                 total_equity_funds = max(1, int(num_funds * allocation['equity'] / 100))
@@ -1510,113 +2068,46 @@ elif page == "🤖 Auto Portfolio":
                 if total < num_funds:
                     total_equity_funds += (num_funds - total)
                 
+                equity_candidates = list(islice(equity_schemes.items(), 200)) if total_equity_funds > 0 else []  # Limit to first 200 for speed
+                debt_candidates = list(islice(debt_schemes.items(), 100)) if total_debt_funds > 0 else []  # Limit to first 100
+                hybrid_candidates = list(islice(hybrid_schemes.items(), 50)) if total_hybrid_funds > 0 else []  # Limit to first 50
+                
                 # Select top ranked EQUITY funds
                 if equity_schemes and total_equity_funds > 0:
                     st.info(f"📊 Selecting top {total_equity_funds} equity funds from {len(equity_schemes)} available...")
                     
                     # Score equity funds based on selected subcategories
-                    subcats = equity_subcats.get(risk_profile, ["Large Cap"])
-                    scored_equity = []
-                    
-                    for code, name in list(equity_schemes.items())[:200]:  # Limit to first 200 for speed
-                        try:
-                            nav_df = get_scheme_historical_nav(code)
-                            if nav_df is not None and len(nav_df) > 252:
-                                nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                                nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
-                                returns = nav_numeric.pct_change().dropna()
-                                
-                                if len(returns) > 252:
-                                    # Calculate Sharpe ratio
-                                    ann_return = np.mean(returns) * 252
-                                    ann_vol = np.std(returns) * np.sqrt(252)
-                                    sharpe = ann_return / ann_vol if ann_vol > 0 and ann_vol == ann_vol else 0
-                                    sharpe = min(max(sharpe, -5), 10)  # Cap sharpe between -5 and 10
-                                    
-                                    # Category bonus - prioritize selected subcategories
-                                    cat_bonus = 1.0
-                                    name_lower = name.lower()
-                                    for subcat in subcats:
-                                        if subcat.lower() in name_lower:
-                                            cat_bonus = 1.5
-                                            break
-                                    
-                                    # Fund age bonus - prefer older funds
-                                    age_years = len(returns) / 252
-                                    age_bonus = min(age_years / 10, 1.0)
-                                    
-                                    score = (sharpe * 10 + age_bonus * 5) * cat_bonus
-                                    scored_equity.append((code, name, score, sharpe))
-                        except:
-                            continue
+                    subcats = EQUITY_SUBCATS.get(risk_profile, ("Large Cap",))
+                    scored_equity = score_funds(equity_candidates, subcats=subcats, age_weight=5.0, age_cap=1.0)
                     
-                    # Sort by score and select top funds
-                    scored_equity.sort(key=lambda x: x[2], reverse=True)
-                    for code, name, score, sharpe in scored_equity[:total_equity_funds]:
-                        if code not in selected_codes:
-                            portfolio_funds.append((code, name, "Equity", sharpe))
-                            selected_codes.add(code)
+                    # Select the top scoring funds
+                    for fund in nlargest(total_equity_funds, scored_equity, key=itemgetter("score")):
+                        if fund["code"] not in selected_codes:
+                            portfolio_funds.append(fund | {"type": "Equity"})
+                            selected_codes.add(fund["code"])
+                            type_counts["Equity"] += 1
                 
                 # Select top DEBT funds
                 if debt_schemes and total_debt_funds > 0:
                     st.info(f"🏢 Selecting top {total_debt_funds} debt funds from {len(debt_schemes)} available...")
-                    scored_debt = []
-                    
-                    for code, name in list(debt_schemes.items())[:100]:  # Limit to first 100
-                        try:
-                            nav_df = get_scheme_historical_nav(code)
-                            if nav_df is not None and len(nav_df) > 252:
-                                nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                                nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
-                                returns = nav_numeric.pct_change().dropna()
-                                
-                                if len(returns) > 252:
-                                    ann_return = np.mean(returns) * 252
-                                    ann_vol = np.std(returns) * np.sqrt(252)
-                                    sharpe = ann_return / ann_vol if ann_vol > 0 and ann_vol == ann_vol else 0
-                                    sharpe = min(max(sharpe, -5), 10)
-                                    
-                                    age_years = len(returns) / 252
-                                    score = sharpe * 10 + (age_years / 10)
-                                    scored_debt.append((code, name, score, sharpe))
-                        except:
-                            continue
+                    scored_debt = score_funds(debt_candidates, age_weight=1.0)
                     
-                    scored_debt.sort(key=lambda x: x[2], reverse=True)
-                    for code, name, score, sharpe in scored_debt[:total_debt_funds]:
-                        if code not in selected_codes:
-                            portfolio_funds.append((code, name, "Debt", sharpe))
-                            selected_codes.add(code)
+                    for fund in nlargest(total_debt_funds, scored_debt, key=itemgetter("score")):
+                        if fund["code"] not in selected_codes:
+                            portfolio_funds.append(fund | {"type": "Debt"})
+                            selected_codes.add(fund["code"])
+                            type_counts["Debt"] += 1
                 
                 # Select top HYBRID funds
                 if hybrid_schemes and total_hybrid_funds > 0:
                     st.info(f"🔄 Selecting top {total_hybrid_funds} hybrid funds from {len(hybrid_schemes)} available...")
-                    scored_hybrid = []
-                    
-                    for code, name in list(hybrid_schemes.items())[:50]:  # Limit to first 50
-                        try:
-                            nav_df = get_scheme_historical_nav(code)
-                            if nav_df is not None and len(nav_df) > 252:
-                                nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                                nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
-                                returns = nav_numeric.pct_change().dropna()
-                                
-                                if len(returns) > 252:
-                                    ann_return = np.mean(returns) * 252
-                                    ann_vol = np.std(returns) * np.sqrt(252)
-                                    sharpe = ann_return / ann_vol if ann_vol > 0 and ann_vol == ann_vol else 0
-                                    sharpe = min(max(sharpe, -5), 10)
-                                    
-                                    score = sharpe * 10
-                                    scored_hybrid.append((code, name, score, sharpe))
-                        except:
-                            continue
+                    scored_hybrid = score_funds(hybrid_candidates)
                     
-                    scored_hybrid.sort(key=lambda x: x[2], reverse=True)
-                    for code, name, score, sharpe in scored_hybrid[:total_hybrid_funds]:
-                        if code not in selected_codes:
-                            portfolio_funds.append((code, name, "Hybrid", sharpe))
-                            selected_codes.add(code)
+                    for fund in nlargest(total_hybrid_funds, scored_hybrid, key=itemgetter("score")):
+                        if fund["code"] not in selected_codes:
+                            portfolio_funds.append(fund | {"type": "Hybrid"})
+                            selected_codes.add(fund["code"])
+                            type_counts["Hybrid"] += 1
                 
                 if len(portfolio_funds) > 0:
                     st.success(f"✅ Generated portfolio with {len(portfolio_funds)} funds!")
@@ -1630,12 +2121,13 @@ elif page == "🤖 Auto Portfolio":
                     st.subheader("📋 Your Auto-Generated Portfolio")
                     
                     portfolio_data = []
-                    for i, (code, name, fund_type, sharpe) in enumerate(portfolio_funds, 1):
+                    for i, fund in enumerate(portfolio_funds, 1):
+                        sharpe = fund["sharpe"]
                         portfolio_data.append({
                             "#": i,
-                            "Fund Name": name[:50],
-                            "Code": code,
-                            "Type": fund_type,
+                            "Fund Name": fund["name"][:50],
+                            "Code": fund["code"],
+                            "Type": fund["type"],
                             "Weight %": f"{weight_per_fund:.1f}%",
                             "Amount (₹)": f"₹{amount_per_fund:,.0f}",
                             "Sharpe Ratio": f"{sharpe:.2f}" if sharpe == sharpe else "N/A"
@@ -1662,10 +2154,6 @@ elif page == "🤖 Auto Portfolio":
                     
                     col1, col2, col3 = st.columns(3)
                     
-                    type_counts = {}
-                    for _, _, fund_type, _ in portfolio_funds:
-                        type_counts[fund_type] = type_counts.get(fund_type, 0) + 1
-                    
                     with col1:
                         st.write("**Asset Class Breakdown:**")
                         for asset_class, count in type_counts.items():
@@ -1703,26 +2191,23 @@ elif page == "🤖 Auto Portfolio":
                     selected_fund_idx = st.selectbox(
                         "Select a fund for detailed analysis:",
                         range(len(portfolio_funds)),
-                        format_func=lambda i: f"{i+1}. {portfolio_funds[i][1][:40]}"
+                        format_func=lambda i: f"{i+1}. {portfolio_funds[i]['name'][:40]}"
                     )
                     
                     if selected_fund_idx is not None:
-                        code, name, fund_type, _ = portfolio_funds[selected_fund_idx]
+                        fund = portfolio_funds[selected_fund_idx]
+                        code, name = fund["code"], fund["name"]
                         
                         st.write(f"**{name}**")
                         st.write(f"Code: {code}")
-                        st.write(f"Type: {fund_type}")
+                        st.write(f"Type: {fund['type']}")
                         
-                        nav_df = get_scheme_historical_nav(code)
-                        if nav_df is not None:
-                            nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                            nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
-                            returns = nav_numeric.pct_change().dropna()
-                            
-                            # Calculate metrics
-                            ann_return = np.mean(returns) * 252
-                            ann_vol = np.std(returns) * np.sqrt(252)
+                        if fund["n"] > 0:
+                            # Metrics were computed while scoring; only the NAV chart needs data
+                            ann_return = fund["ann_return"]
+                            ann_vol = fund["ann_vol"]
                             sharpe = ann_return / ann_vol if ann_vol > 0 and ann_vol == ann_vol else 0
+                            nav_values, nav_dates = clean_nav_array(code)
                             
                             col1, col2, col3, col4 = st.columns(4)
                             with col1:
@@ -1732,25 +2217,18 @@ elif page == "🤖 Auto Portfolio":
                             with col3:
                                 st.metric("Sharpe Ratio", f"{sharpe:.2f}")
                             with col4:
-                                st.metric("Data Points", f"{len(returns)}")
+                                st.metric("Data Points", f"{fund['n']}")
                             
                             # Plot NAV
-                            fig = go.Figure()
-                            fig.add_trace(go.Scatter(
-                                x=nav_df.index,
-                                y=nav_numeric.values,
+                            nav_pos, nav_plot = downsample(nav_values)
+                            fig = go.Figure(go.Scatter(
+                                x=nav_dates[nav_pos],
+                                y=nav_plot.astype(np.float32, copy=False),
                                 mode='lines',
                                 name='NAV',
                                 line=dict(color='#667eea', width=2)
                             ))
-                            
-                            fig.update_layout(
-                                title=f"NAV Trend - {name[:30]}",
-                                xaxis_title="Date",
-                                yaxis_title="NAV (₹)",
-                                template='plotly_dark',
-                                height=400
-                            )
+                            fig.update_layout(title=f"NAV Trend - {name[:30]}", **NAV_CHART_LAYOUT)
                             
                             st.plotly_chart(fig, use_container_width=True)
                 else:
@@ -1768,34 +2246,11 @@ elif page == "🤖 Auto Portfolio":
     st.title("🤖 AI-Powered Auto Portfolio Maker")
     st.markdown("Generate optimal portfolios based on rolling returns analysis and performance metrics")
     
-    # Rolling Returns Data for Benchmarks
-    ROLLING_RETURNS_DATA = {
-        'Nifty Midcap 150 Momentum 50': {
-            '1Y': {'avg': 22.12, 'sharpe': 4.39, 'std': 3.67},
-            '3Y': {'avg': 20.20, 'sharpe': 1.51, 'std': 8.78},
-            '5Y': {'avg': 20.28, 'sharpe': 1.53, 'std': 1.33},
-            '7Y': {'avg': 18.79, 'sharpe': 2.74, 'std': 7.14},
-            '10Y': {'avg': 17.15, 'sharpe': 4.39, 'std': 10.69}
-        },
-        'Nifty 50': {
-            '1Y': {'avg': 10.77, 'sharpe': 1.99, 'std': 2.40},
-            '3Y': {'avg': 9.90, 'sharpe': 1.53, 'std': 12.20},
-            '5Y': {'avg': 12.30, 'sharpe': 1.91, 'std': 1.33},
-            '7Y': {'avg': 7.14, 'sharpe': 1.97, 'std': 7.14},
-            '10Y': {'avg': 10.77, 'sharpe': 1.99, 'std': 10.69}
-        },
-        'Nifty Smallcap 250': {
-            '1Y': {'avg': 12.19, 'sharpe': 1.46, 'std': 4.23},
-            '3Y': {'avg': 11.50, 'sharpe': 1.62, 'std': 15.30},
-            '5Y': {'avg': 13.40, 'sharpe': 1.82, 'std': 2.10},
-            '7Y': {'avg': 12.80, 'sharpe': 1.88, 'std': 8.90},
-            '10Y': {'avg': 14.20, 'sharpe': 2.15, 'std': 11.50}
-        }
-    }
-    
     tab1, tab2, tab3 = st.tabs(["⚙️ Portfolio Generator", "📊 Risk Analysis", "🎯 Recommendations"])
     
-    with tab1:
+    # Each tab is its own fragment, so a widget change reruns only the tab it lives in
+    @st.fragment
+    def render_generator_tab():
         st.subheader("Configure Your Auto Portfolio")
         
         col1, col2, col3 = st.columns(3)
@@ -1828,29 +2283,16 @@ elif page == "🤖 Auto Portfolio":
         with col1:
             st.subheader("Asset Class Allocation")
             
-            if risk_profile == "Conservative":
-                equity_pct = st.slider("Equity %", 20, 40, 30)
-                debt_pct = st.slider("Debt %", 50, 70, 60)
-                hybrid_pct = 100 - equity_pct - debt_pct
-            elif risk_profile == "Moderate":
-                equity_pct = st.slider("Equity %", 40, 60, 50)
-                debt_pct = st.slider("Debt %", 30, 50, 40)
-                hybrid_pct = 100 - equity_pct - debt_pct
-            else:  # Aggressive
-                equity_pct = st.slider("Equity %", 60, 80, 70)
-                debt_pct = st.slider("Debt %", 10, 30, 20)
-                hybrid_pct = 100 - equity_pct - debt_pct
+            eq_lo, eq_hi, eq_def, db_lo, db_hi, db_def = RISK_SLIDERS[risk_profile]
+            equity_pct = st.slider("Equity %", eq_lo, eq_hi, eq_def)
+            debt_pct = st.slider("Debt %", db_lo, db_hi, db_def)
+            hybrid_pct = 100 - equity_pct - debt_pct
             
             st.info(f"Hybrid: {hybrid_pct}%")
             
             # Visualization
-            alloc_data = [equity_pct, debt_pct, hybrid_pct]
-            fig_alloc = go.Figure(data=[go.Pie(
-                labels=['Equity', 'Debt', 'Hybrid'],
-                values=alloc_data,
-                marker=dict(colors=['#667eea', '#ff6b6b', '#ffd93d'])
-            )])
-            fig_alloc.update_layout(title="Asset Allocation", height=400, template='plotly_dark')
+            alloc_data = (equity_pct, debt_pct, hybrid_pct)
+            fig_alloc = build_asset_pie(alloc_data, "Asset Allocation", 400)
             st.plotly_chart(fig_alloc, use_container_width=True)
         
         with col2:
@@ -1862,15 +2304,14 @@ elif page == "🤖 Auto Portfolio":
             
             st.info(f"Small Cap: {small_cap_pct}%")
             
-            equity_sub = [large_cap_pct, mid_cap_pct, small_cap_pct]
-            fig_equity = go.Figure(data=[go.Bar(
-                x=['Large Cap', 'Mid Cap', 'Small Cap'],
-                y=equity_sub,
-                text=[f"{x}%" for x in equity_sub],
-                textposition='outside',
-                marker_color=['#667eea', '#764ba2', '#f093fb']
-            )])
-            fig_equity.update_layout(title="Equity Distribution", height=400, template='plotly_dark', showlegend=False)
+            equity_sub = (large_cap_pct, mid_cap_pct, small_cap_pct)
+            fig_equity = build_bar_figure(
+                ('Large Cap', 'Mid Cap', 'Small Cap'),
+                equity_sub,
+                tuple(f"{x}%" for x in equity_sub),
+                PALETTE_PURPLE,
+                "Equity Distribution"
+            )
             st.plotly_chart(fig_equity, use_container_width=True)
         
         st.markdown("---")
@@ -1879,92 +2320,75 @@ elif page == "🤖 Auto Portfolio":
             with st.spinner("Analyzing funds and generating optimal portfolio..."):
                 
                 # Get funds by category
-                equity_schemes = filter_schemes_by_type("equity")
-                debt_schemes = filter_schemes_by_type("debt")
-                hybrid_schemes = filter_schemes_by_type("hybrid")
+                equity_schemes, debt_schemes, hybrid_schemes = get_scheme_universe()
                 
                 portfolio_allocation = {}
-                portfolio_recommendations = []
+                # Per-fund allocation % for large/mid/small cap, debt and hybrid in one broadcast:
+                # each category's share of the portfolio split evenly over the funds it picks
+                cap_pcts = np.array([large_cap_pct, mid_cap_pct, small_cap_pct]) * equity_pct / 100
+                category_pcts = np.append(cap_pcts, [debt_pct, hybrid_pct])
+                per_fund_pcts = (category_pcts / np.array([3, 3, 3, 3, 2])).tolist()
+                debt_allocation, hybrid_allocation = per_fund_pcts[3:]
                 
-                # Select best funds from each category
-                # Large Cap
-                if equity_schemes:
-                    large_cap_funds = [name for code, name in equity_schemes.items() if 'large' in name.lower()][:3]
-                    large_cap_allocation = (equity_pct * large_cap_pct / 100) / 3 if large_cap_funds else 0
-                    for fund in large_cap_funds:
-                        for code, name in equity_schemes.items():
-                            if name == fund:
-                                portfolio_recommendations.append({
-                                    'Category': 'Large Cap',
-                                    'Scheme': name,
-                                    'Allocation %': large_cap_allocation,
-                                    'Amount': f"₹{(large_cap_allocation / 100) * investment_amount:,.0f}"
-                                })
+                # Recommendation columns, filled per category and framed once at the end
+                rec_categories = []
+                rec_schemes = []
+                rec_pcts = []
                 
-                # Mid Cap
-                if equity_schemes:
-                    mid_cap_funds = [name for code, name in equity_schemes.items() if 'mid' in name.lower()][:3]
-                    mid_cap_allocation = (equity_pct * mid_cap_pct / 100) / 3 if mid_cap_funds else 0
-                    for fund in mid_cap_funds:
-                        for code, name in equity_schemes.items():
-                            if name == fund:
-                                portfolio_recommendations.append({
-                                    'Category': 'Mid Cap',
-                                    'Scheme': name,
-                                    'Allocation %': mid_cap_allocation,
-                                    'Amount': f"₹{(mid_cap_allocation / 100) * investment_amount:,.0f}"
-                                })
+                # Select best funds from each category: the first 3 equity schemes naming each
+                # market cap, precomputed from the scheme index. Caps with no allocation get no picks
+                cap_picks = get_market_cap_picks() if equity_schemes else {}
+                cap_buckets = {
+                    cap_key: cap_picks[cap_key]
+                    for cap_key, cap_allocation in zip(MARKET_CAP_KEYWORDS, per_fund_pcts[:3])
+                    if cap_allocation > 0 and cap_key in cap_picks
+                }
                 
-                # Small Cap
-                if equity_schemes:
-                    small_cap_funds = [name for code, name in equity_schemes.items() if 'small' in name.lower()][:3]
-                    small_cap_allocation = (equity_pct * small_cap_pct / 100) / 3 if small_cap_funds else 0
-                    for fund in small_cap_funds:
-                        for code, name in equity_schemes.items():
-                            if name == fund:
-                                portfolio_recommendations.append({
-                                    'Category': 'Small Cap',
-                                    'Scheme': name,
-                                    'Allocation %': small_cap_allocation,
-                                    'Amount': f"₹{(small_cap_allocation / 100) * investment_amount:,.0f}"
-                                })
+                for category, cap_key, cap_allocation in zip(
+                    ('Large Cap', 'Mid Cap', 'Small Cap'), MARKET_CAP_KEYWORDS, per_fund_pcts[:3]
+                ):
+                    cap_funds = cap_buckets.get(cap_key, [])
+                    rec_categories += [category] * len(cap_funds)
+                    rec_schemes += [name for _, name in cap_funds]
+                    rec_pcts += [cap_allocation] * len(cap_funds)
                 
                 # Debt funds
-                if debt_schemes:
-                    debt_funds = list(debt_schemes.items())[:3]
-                    debt_allocation = debt_pct / 3
-                    for code, name in debt_funds:
-                        portfolio_recommendations.append({
-                            'Category': 'Debt',
-                            'Scheme': name,
-                            'Allocation %': debt_allocation,
-                            'Amount': f"₹{(debt_allocation / 100) * investment_amount:,.0f}"
-                        })
+                if debt_schemes and debt_pct > 0:
+                    debt_funds = list(islice(debt_schemes.items(), 3))
+                    rec_categories += ['Debt'] * len(debt_funds)
+                    rec_schemes += [name for _, name in debt_funds]
+                    rec_pcts += [debt_allocation] * len(debt_funds)
                 
                 # Hybrid funds
                 if hybrid_schemes and hybrid_pct > 0:
-                    hybrid_funds = list(hybrid_schemes.items())[:2]
-                    hybrid_allocation = hybrid_pct / 2 if hybrid_funds else 0
-                    for code, name in hybrid_funds:
-                        portfolio_recommendations.append({
-                            'Category': 'Hybrid',
-                            'Scheme': name,
-                            'Allocation %': hybrid_allocation,
-                            'Amount': f"₹{(hybrid_allocation / 100) * investment_amount:,.0f}"
-                        })
+                    hybrid_funds = list(islice(hybrid_schemes.items(), 2))
+                    rec_categories += ['Hybrid'] * len(hybrid_funds)
+                    rec_schemes += [name for _, name in hybrid_funds]
+                    rec_pcts += [hybrid_allocation] * len(hybrid_funds)
                 
-                if portfolio_recommendations:
+                if rec_schemes:
                     st.success("✅ Portfolio generated successfully!")
                     
-                    df_portfolio = pd.DataFrame(portfolio_recommendations)
-                    st.dataframe(df_portfolio, use_container_width=True, hide_index=True)
+                    # Keep amounts numeric (sortable) and format the whole column at display time
+                    alloc_pcts = np.array(rec_pcts, dtype=np.float64)
+                    df_portfolio = pd.DataFrame({
+                        'Category': rec_categories,
+                        'Scheme': rec_schemes,
+                        'Allocation %': alloc_pcts,
+                        'Amount': alloc_pcts / 100 * investment_amount
+                    })
+                    st.dataframe(
+                        df_portfolio.style.format({'Allocation %': '{:.2f}%', 'Amount': '₹{:,.0f}'}),
+                        use_container_width=True,
+                        hide_index=True
+                    )
                     
                     # Summary metrics
                     col1, col2, col3, col4 = st.columns(4)
                     with col1:
                         st.metric("Total Allocation", "100%")
                     with col2:
-                        st.metric("Funds Selected", len(portfolio_recommendations))
+                        st.metric("Funds Selected", len(rec_schemes))
                     with col3:
                         st.metric("Investment Amount", f"₹{investment_amount:,}")
                     with col4:
@@ -1972,7 +2396,8 @@ elif page == "🤖 Auto Portfolio":
                 else:
                     st.warning("No funds found for the selected criteria")
     
-    with tab2:
+    @st.fragment
+    def render_risk_tab():
         st.subheader("Risk Analysis")
         
         col1, col2 = st.columns(2)
@@ -1980,95 +2405,50 @@ elif page == "🤖 Auto Portfolio":
         with col1:
             st.write("**Rolling Returns Performance**")
             
-            time_period = st.radio("Select Time Period:", ["1Y", "3Y", "5Y", "7Y", "10Y"])
-            
-            rolling_returns = []
-            indices = []
+            time_period = st.radio("Select Time Period:", ROLLING_RETURNS_PERIODS)
             
-            for index, data in ROLLING_RETURNS_DATA.items():
-                if time_period in data:
-                    rolling_returns.append(data[time_period]['avg'])
-                    indices.append(index)
+            # Both charts read the same benchmark column for the chosen period
+            period_col = ROLLING_RETURNS_PERIODS.index(time_period)
+            indices = ROLLING_RETURNS_INDICES
+            rolling_returns = ROLLING_RETURNS_STATS['avg'][:, period_col]
             
-            if rolling_returns:
-                fig_rolling = go.Figure(data=[go.Bar(
-                    x=indices,
-                    y=rolling_returns,
-                    text=[f"{x:.2f}%" for x in rolling_returns],
-                    textposition='outside',
-                    marker_color=['#667eea', '#764ba2', '#f093fb']
-                )])
-                fig_rolling.update_layout(
-                    title=f"{time_period} Rolling CAGR Returns Comparison",
-                    yaxis_title="Average Rolling CAGR (%)",
-                    template='plotly_dark',
-                    height=400
+            if len(rolling_returns):
+                fig_rolling = build_bar_figure(
+                    indices,
+                    rolling_returns,
+                    [f"{x:.2f}%" for x in rolling_returns],
+                    PALETTE_PURPLE,
+                    f"{time_period} Rolling CAGR Returns Comparison",
+                    yaxis_title="Average Rolling CAGR (%)"
                 )
                 st.plotly_chart(fig_rolling, use_container_width=True)
         
         with col2:
             st.write("**Sharpe Ratio Comparison**")
             
-            sharpe_ratios = []
-            indices = []
-            
-            for index, data in ROLLING_RETURNS_DATA.items():
-                if time_period in data:
-                    sharpe_ratios.append(data[time_period]['sharpe'])
-                    indices.append(index)
+            sharpe_ratios = ROLLING_RETURNS_STATS['sharpe'][:, period_col]
             
-            if sharpe_ratios:
-                fig_sharpe = go.Figure(data=[go.Bar(
-                    x=indices,
-                    y=sharpe_ratios,
-                    text=[f"{x:.2f}" for x in sharpe_ratios],
-                    textposition='outside',
-                    marker_color=['#ff6b6b', '#ff8c42', '#ffd93d']
-                )])
-                fig_sharpe.update_layout(
-                    title=f"{time_period} Sharpe Ratio Comparison",
-                    yaxis_title="Sharpe Ratio",
-                    template='plotly_dark',
-                    height=400
+            if len(sharpe_ratios):
+                fig_sharpe = build_bar_figure(
+                    indices,
+                    sharpe_ratios,
+                    [f"{x:.2f}" for x in sharpe_ratios],
+                    PALETTE_WARM,
+                    f"{time_period} Sharpe Ratio Comparison",
+                    yaxis_title="Sharpe Ratio"
                 )
                 st.plotly_chart(fig_sharpe, use_container_width=True)
     
-    with tab3:
+    @st.fragment
+    def render_recommendations_tab():
         st.subheader("Portfolio Recommendations")
         
         rec_type = st.selectbox(
             "Recommendation Type:",
-            ["Income Generation", "Capital Growth", "Balanced", "Tax Efficient"]
+            list(RECOMMENDATIONS)
         )
         
-        recommendations = {
-            'Income Generation': {
-                'description': 'Focus on debt & dividend-yielding equity funds',
-                'equity': 30,
-                'debt': 60,
-                'hybrid': 10
-            },
-            'Capital Growth': {
-                'description': 'Aggressive equity allocation for long-term growth',
-                'equity': 80,
-                'debt': 10,
-                'hybrid': 10
-            },
-            'Balanced': {
-                'description': 'Mix of equity & debt for steady growth',
-                'equity': 50,
-                'debt': 40,
-                'hybrid': 10
-            },
-            'Tax Efficient': {
-                'description': 'Tax-saving and ELSS funds for long-term wealth',
-                'equity': 60,
-                'debt': 25,
-                'hybrid': 15
-            }
-        }
-        
-        rec = recommendations[rec_type]
+        rec = RECOMMENDATIONS[rec_type]
         st.write(f"**{rec['description']}**")
         
         col1, col2, col3 = st.columns(3)
@@ -2079,13 +2459,15 @@ elif page == "🤖 Auto Portfolio":
         with col3:
             st.metric("Hybrid", f"{rec['hybrid']}%")
         
-        fig_rec = go.Figure(data=[go.Pie(
-            labels=['Equity', 'Debt', 'Hybrid'],
-            values=[rec['equity'], rec['debt'], rec['hybrid']],
-            marker=dict(colors=['#667eea', '#ff6b6b', '#ffd93d'])
-        )])
-        fig_rec.update_layout(title=f"{rec_type} Portfolio", height=500, template='plotly_dark')
+        fig_rec = build_asset_pie((rec['equity'], rec['debt'], rec['hybrid']), f"{rec_type} Portfolio", 500)
         st.plotly_chart(fig_rec, use_container_width=True)
+    
+    with tab1:
+        render_generator_tab()
+    with tab2:
+        render_risk_tab()
+    with tab3:
+        render_recommendations_tab()
 
 # =============================================================================
 # PAGE: PERFORMANCE
@@ -2137,7 +2519,6 @@ elif page == "📈 Performance":
                     # Filter schemes for selected category
                     category_schemes = {}
                     keywords = category_keywords.get(perf_category, [])
-                    exclude_patterns = ['dividend', 'idcw', 'monthly', 'quarterly', 'payout', 'bonus', 'direct']
                     
                     for code, name in all_schemes.items():
                         if not name or not isinstance(name, str):
@@ -2146,7 +2527,7 @@ elif page == "📈 Performance":
                         name_lower = name.lower()
                         
                         # Skip excluded patterns
-                        if any(p in name_lower for p in exclude_patterns):
+                        if _PERFORMANCE_EXCLUDE_RE.search(name_lower):
                             continue
                         
                         # Keep only growth/regular
@@ -2164,15 +2545,16 @@ elif page == "📈 Performance":
                         perf_data = []
                         top_performers = []
                         
-                        for code, name in list(category_schemes.items())[:30]:
+                        perf_details = get_details_batch(list(category_schemes)[:30])
+                        
+                        for code, name in islice(category_schemes.items(), 30):
                             try:
                                 quote = get_scheme_quote(code)
                                 nav_df = get_scheme_historical_nav(code)
-                                details = get_scheme_details(code)
+                                details = perf_details.get(code)
                                 
                                 if quote and nav_df is not None and len(nav_df) > 252:
-                                    nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                                    nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
+                                    nav_numeric = pd.Series(clean_nav_array(code)[0])
                                     
                                     # Calculate returns for different periods
                                     if len(nav_numeric) > 252:
@@ -2221,7 +2603,7 @@ elif page == "📈 Performance":
                                 metrics_cols = st.columns(min(3, len(top_performers)))
                                 
                                 for idx, (code, name, ret_1y, nav_numeric) in enumerate(top_performers[:3]):
-                                    returns = nav_numeric.pct_change().dropna()
+                                    returns = pd.Series(get_daily_returns(code))
                                     
                                     ann_return = np.mean(returns) * 252
                                     ann_vol = np.std(returns) * np.sqrt(252)
@@ -2233,9 +2615,7 @@ elif page == "📈 Performance":
                                     sortino = (ann_return - 0.05) / downside_vol if downside_vol > 0 else 0
                                     
                                     cumulative = (1 + returns).cumprod()
-                                    running_max = cumulative.cummax()
-                                    drawdown = (cumulative - running_max) / running_max
-                                    max_dd = drawdown.min()
+                                    max_dd = DataProcessor.calculate_drawdown(cumulative) / 100
                                     
                                     calmar = abs(ann_return / max_dd) if max_dd != 0 else 0
                                     win_rate = (len(returns[returns > 0]) / len(returns) * 100) if len(returns) > 0 else 0
@@ -2274,7 +2654,6 @@ elif page == "📈 Performance":
                     }
                     
                     cat_stats = []
-                    exclude_patterns = ['dividend', 'idcw', 'monthly', 'quarterly', 'payout', 'bonus', 'direct']
                     
                     for cat_name, keywords in categories_def.items():
                         cat_schemes = {}
@@ -2285,7 +2664,7 @@ elif page == "📈 Performance":
                             
                             name_lower = name.lower()
                             
-                            if any(p in name_lower for p in exclude_patterns):
+                            if _PERFORMANCE_EXCLUDE_RE.search(name_lower):
                                 continue
                             
                             if 'growth' not in name_lower and 'regular' not in name_lower:
@@ -2301,9 +2680,7 @@ elif page == "📈 Performance":
                                 try:
                                     nav_df = get_scheme_historical_nav(code)
                                     if nav_df is not None and len(nav_df) > 252:
-                                        nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                                        nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
-                                        returns = nav_numeric.pct_change().dropna()
+                                        nav_numeric = pd.Series(clean_nav_array(code)[0])
                                         
                                         if len(nav_numeric) > 252:
                                             ret_1y = ((nav_numeric.iloc[-1] / nav_numeric.iloc[-252]) - 1) * 100
@@ -2379,7 +2756,6 @@ elif page == "📈 Performance":
                     }
                     
                     debt_schemes = {}
-                    exclude_patterns = ['dividend', 'idcw', 'monthly', 'quarterly', 'payout', 'bonus', 'direct']
                     keywords = debt_keywords.get(debt_category, [])
                     
                     for code, name in all_schemes.items():
@@ -2388,7 +2764,7 @@ elif page == "📈 Performance":
                         
                         name_lower = name.lower()
                         
-                        if any(p in name_lower for p in exclude_patterns):
+                        if _PERFORMANCE_EXCLUDE_RE.search(name_lower):
                             continue
                         
                         if 'growth' not in name_lower and 'regular' not in name_lower:
@@ -2407,15 +2783,16 @@ elif page == "📈 Performance":
                         perf_data_debt = []
                         top_debt = []
                         
-                        for code, name in list(debt_schemes.items())[:25]:
+                        debt_details = get_details_batch(list(debt_schemes)[:25])
+                        
+                        for code, name in islice(debt_schemes.items(), 25):
                             try:
                                 quote = get_scheme_quote(code)
                                 nav_df = get_scheme_historical_nav(code)
-                                details = get_scheme_details(code)
+                                details = debt_details.get(code)
                                 
                                 if quote and nav_df is not None and len(nav_df) > 252:
-                                    nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                                    nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
+                                    nav_numeric = pd.Series(clean_nav_array(code)[0])
                                     
                                     if len(nav_numeric) > 252:
                                         ret_1y = ((nav_numeric.iloc[-1] / nav_numeric.iloc[-252]) - 1) * 100
@@ -2456,7 +2833,7 @@ elif page == "📈 Performance":
                                 debt_metrics_cols = st.columns(min(3, len(top_debt)))
                                 
                                 for idx, (code, name, ret_1y, nav_numeric) in enumerate(top_debt[:3]):
-                                    returns = nav_numeric.pct_change().dropna()
+                                    returns = pd.Series(get_daily_returns(code))
                                     
                                     ann_return = np.mean(returns) * 252
                                     ann_vol = np.std(returns) * np.sqrt(252)
@@ -2468,9 +2845,7 @@ elif page == "📈 Performance":
                                     sortino = (ann_return - 0.03) / downside_vol if downside_vol > 0 else 0
                                     
                                     cumulative = (1 + returns).cumprod()
-                                    running_max = cumulative.cummax()
-                                    drawdown = (cumulative - running_max) / running_max
-                                    max_dd = drawdown.min()
+                                    max_dd = DataProcessor.calculate_drawdown(cumulative) / 100
                                     
                                     with debt_metrics_cols[idx]:
                                         st.write(f"**{name[:30]}...**")
@@ -2603,12 +2978,10 @@ elif page == "📉 Advanced Analysis":
                 nav_df = get_scheme_historical_nav(selected_code)
                 
                 if nav_df is not None:
-                    nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                    nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
+                    nav_numeric = pd.Series(clean_nav_array(selected_code)[0])
                     
                     # Calculate drawdown
-                    cumulative_max = nav_numeric.cummax()
-                    drawdown = ((nav_numeric - cumulative_max) / cumulative_max * 100).values
+                    drawdown = DataProcessor.drawdown_series(nav_numeric)
                     
                     max_dd = drawdown.min()
                     current_dd = drawdown[-1]
@@ -2917,10 +3290,8 @@ elif page == "📉 Advanced Analysis":
                     for code in corr_codes:
                         nav_df = get_scheme_historical_nav(code)
                         if nav_df is not None:
-                            nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                            nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
                             # Calculate daily returns
-                            returns = nav_numeric.pct_change().dropna()
+                            returns = pd.Series(get_daily_returns(code))
                             nav_series[st.session_state.selected_schemes[code]] = returns
                     
                     if nav_series and len(nav_series) > 1:
@@ -3071,32 +3442,36 @@ elif page == "⭐ Fund Rankings":
             '10Y': 2520
         }
         
+        values = DataProcessor._as_array(returns)
+        
+        # Right-closed daily bucket edges: <=0, (0, 1%], (1%, 9%], (9%, 15%], (15%, 20%], >20% annualized
+        bucket_edges = np.array([0, 0.01, 0.09, 0.15, 0.20]) / trading_days_per_year
+        
         for period_name, period_days in rolling_periods.items():
-            if len(returns) < period_days:
+            if len(values) < period_days:
                 continue
             
-            # Get rolling window
-            rolling_returns = returns.iloc[-period_days:] if period_days <= len(returns) else returns
-            
-            if len(rolling_returns) < period_days:
-                continue
+            # Get rolling window (a slice view, no copy)
+            rolling_returns = values[-period_days:]
             
             # Calculate metrics
             min_return = rolling_returns.min() * 100
             max_return = rolling_returns.max() * 100
-            std_dev = rolling_returns.std() * np.sqrt(trading_days_per_year) * 100
+            std_dev = rolling_returns.std(ddof=1) * np.sqrt(trading_days_per_year) * 100
             avg_return = rolling_returns.mean() * trading_days_per_year * 100
             
-            # Distribution analysis
-            positive_count = len(rolling_returns[rolling_returns > 0])
-            negative_count = len(rolling_returns[rolling_returns <= 0])
+            # Distribution analysis - bucket every return in one searchsorted pass. searchsorted
+            # sorts NaN past the last edge, so NaN returns are dropped first (they fall in no bucket
+            # but still count towards the total, as in the comparison-based version; +inf stays >20%)
             total_count = len(rolling_returns)
+            comparable_returns = rolling_returns[~np.isnan(rolling_returns)]
+            bucket_pct = np.bincount(np.searchsorted(bucket_edges, comparable_returns, side='left'), minlength=6) / total_count * 100
             
-            less_than_0 = negative_count / total_count * 100
-            between_1_9 = len(rolling_returns[(rolling_returns > 0.01/trading_days_per_year) & (rolling_returns <= 0.09/trading_days_per_year)]) / total_count * 100
-            between_10_15 = len(rolling_returns[(rolling_returns > 0.09/trading_days_per_year) & (rolling_returns <= 0.15/trading_days_per_year)]) / total_count * 100
-            between_15_20 = len(rolling_returns[(rolling_returns > 0.15/trading_days_per_year) & (rolling_returns <= 0.20/trading_days_per_year)]) / total_count * 100
-            above_20 = len(rolling_returns[rolling_returns > 0.20/trading_days_per_year]) / total_count * 100
+            less_than_0 = bucket_pct[0]
+            between_1_9 = bucket_pct[2]
+            between_10_15 = bucket_pct[3]
+            between_15_20 = bucket_pct[4]
+            above_20 = bucket_pct[5]
             
             # Sharpe ratio
             sharpe = (avg_return / 100) / (std_dev / 100) if std_dev > 0 else 0
@@ -3142,9 +3517,7 @@ elif page == "⭐ Fund Rankings":
         
         # 3. Maximum Drawdown
         cumulative = (1 + returns).cumprod()
-        running_max = cumulative.cummax()
-        drawdown = (cumulative - running_max) / running_max
-        max_dd = drawdown.min()
+        max_dd = DataProcessor.calculate_drawdown(cumulative) / 100
         metrics['Max Drawdown %'] = max_dd * 100
         
         # 4. Calmar Ratio
@@ -3328,16 +3701,17 @@ elif page == "⭐ Fund Rankings":
                         fund_house_count = {}
                         max_per_house = 5
                         
-                        for code, name in list(category_schemes.items())[:100]:  # Analyze up to 100 funds
+                        ranking_details = get_details_batch(list(category_schemes)[:100])
+                        
+                        for code, name in islice(category_schemes.items(), 100):  # Analyze up to 100 funds
                             try:
                                 nav_df = get_scheme_historical_nav(code)
                                 quote = get_scheme_quote(code)
-                                details = get_scheme_details(code)
+                                details = ranking_details.get(code)
                                 
                                 if nav_df is not None and quote:
-                                    nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                                    nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
-                                    returns = nav_numeric.pct_change().dropna()
+                                    nav_numeric = pd.Series(clean_nav_array(code)[0])
+                                    returns = pd.Series(get_daily_returns(code))
                                     
                                     # Get rolling returns analysis
                                     rolling_analysis = calculate_rolling_returns_analysis(returns)
@@ -3398,9 +3772,7 @@ elif page == "⭐ Fund Rankings":
                                     
                                     # **NEW: Max Drawdown Recovery (Calmar Ratio)**
                                     cumulative = (1 + returns).cumprod()
-                                    running_max = cumulative.cummax()
-                                    drawdown = (cumulative - running_max) / running_max
-                                    max_dd = drawdown.min()
+                                    max_dd = DataProcessor.calculate_drawdown(cumulative) / 100
                                     ann_return = mean_ret if np.isfinite(mean_ret) else 0
                                     calmar = abs(ann_return / max_dd) if (max_dd < 0 and np.isfinite(max_dd)) else 0
                                     
@@ -3579,9 +3951,7 @@ elif page == "⭐ Fund Rankings":
                                 # Recalculate metrics for top fund to get breakdown
                                 nav_df = get_scheme_historical_nav(top_fund_code)
                                 if nav_df is not None:
-                                    nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                                    nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
-                                    returns = nav_numeric.pct_change().dropna()
+                                    returns = pd.Series(get_daily_returns(top_fund_code))
                                     
                                     metric_names = list(SCORING_WEIGHTS.keys())
                                     
@@ -3603,9 +3973,7 @@ elif page == "⭐ Fund Rankings":
                                     
                                     # New metrics
                                     cumulative = (1 + returns).cumprod()
-                                    running_max = cumulative.cummax()
-                                    drawdown = (cumulative - running_max) / running_max
-                                    max_dd = drawdown.min()
+                                    max_dd = DataProcessor.calculate_drawdown(cumulative) / 100
                                     ann_return = np.mean(returns) * 252
                                     calmar = abs(ann_return / max_dd) if max_dd != 0 else 0
                                     max_dd_recovery = min(100, max(0, calmar * 10))
@@ -3679,9 +4047,7 @@ elif page == "⭐ Fund Rankings":
                             nav_df = get_scheme_historical_nav(top_fund_code)
                             
                             if nav_df is not None:
-                                nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                                nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
-                                returns = nav_numeric.pct_change().dropna()
+                                returns = pd.Series(get_daily_returns(top_fund_code))
                                 
                                 # Get benchmark data
                                 bench_returns = None
@@ -3806,9 +4172,7 @@ elif page == "⭐ Fund Rankings":
                                     nav_df = get_scheme_historical_nav(code)
                                     
                                     if nav_df is not None:
-                                        nav_numeric = pd.to_numeric(nav_df['nav'], errors='coerce').dropna()
-                                        nav_numeric = nav_numeric.iloc[::-1].reset_index(drop=True)
-                                        returns = nav_numeric.pct_change().dropna()
+                                        returns = pd.Series(get_daily_returns(code))
                                         
                                         metrics_row = calculate_advanced_metrics(returns, bench_returns)
                                         
@@ -4103,19 +4467,8 @@ elif page == "ℹ️ Fund Info":
                 st.write(f"**Expected Returns:** {allocation['expected_return']} annually")
                 
                 # Allocation pie chart
-                allocation_data = [int(allocation['equity'][:-1]), int(allocation['debt'][:-1]), int(allocation['hybrid'][:-1])]
-                allocation_labels = ['Equity', 'Debt', 'Hybrid']
-                
-                fig = go.Figure(data=[go.Pie(
-                    labels=allocation_labels,
-                    values=allocation_data,
-                    marker=dict(colors=['#667eea', '#ff6b6b', '#ffd93d'])
-                )])
-                fig.update_layout(
-                    title=f"{profile} Allocation",
-                    height=300,
-                    template='plotly_dark'
-                )
+                allocation_data = (int(allocation['equity'][:-1]), int(allocation['debt'][:-1]), int(allocation['hybrid'][:-1]))
+                fig = build_asset_pie(allocation_data, f"{profile} Allocation", 300)
                 st.plotly_chart(fig, use_container_width=True)
     
     with col2:
@@ -0,0 +1,131 @@
+"""Regression tests for app.py, run through Streamlit's AppTest against an offline mftool stand-in"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+SCHEMES = {
+    "100000": "HDFC Large Cap Fund - Regular Plan - Growth",
+    "100003": "SBI Large Cap Fund - Regular Plan - Growth",
+    "100004": "Axis Large Cap Fund - Regular Plan - Growth",
+}
+
+
+def synthetic_navs(scheme_code, n=600):
+    """Get a deterministic chronological NAV series for a scheme"""
+    rng = np.random.default_rng(int(scheme_code))
+    return 10 * np.cumprod(1 + rng.normal(0.0005, 0.01, n))
+
+
+class FakeMftool:
+    """Offline stand-in for mftool.Mftool serving chronological NAVs from the navs mapping"""
+    navs = {}
+
+    def __init__(self):
+        import requests
+        self._session = requests.session()
+        self._scheme_codes_cache = mock.Mock()
+        self._scheme_codes = self.get_scheme_codes().keys()
+
+    def get_scheme_codes(self, as_json=False):
+        return dict(SCHEMES)
+
+    def get_available_schemes(self, amc_name):
+        return {code: name for code, name in SCHEMES.items() if amc_name.lower() in name.lower()}
+
+    def get_scheme_historical_nav(self, code, as_json=False, as_Dataframe=False):
+        navs = self.navs.get(code)
+        if navs is None:
+            navs = synthetic_navs(code)
+        dates = pd.bdate_range(end="2026-10-14", periods=len(navs))
+        # mfapi lists newest first, with NAVs as strings
+        return pd.DataFrame(
+            {"nav": [f"{nav:.4f}" for nav in navs[::-1]]},
+            index=pd.Index(dates.strftime("%d-%m-%Y")[::-1], name="date"),
+        )
+
+    def get_scheme_quote(self, code, as_json=False):
+        nav_df = self.get_scheme_historical_nav(code)
+        return {"scheme_code": code, "scheme_name": SCHEMES.get(code, code),
+                "nav": nav_df["nav"].iloc[0], "last_updated": nav_df.index[0]}
+
+    def get_scheme_details(self, code, as_json=False):
+        return {"fund_house": SCHEMES.get(code, "X").split()[0] + " Mutual Fund",
+                "scheme_category": "Equity Scheme", "scheme_type": "Open Ended"}
+
+
+def _daily_returns_script(app_path, scheme_code):
+    """AppTest script: run the app, then expose one scheme's daily returns via session state"""
+    import runpy
+    import streamlit as st
+    app = runpy.run_path(app_path)
+    st.session_state["daily_returns"] = app["get_daily_returns"](scheme_code)
+
+
+class AppTestCase(unittest.TestCase):
+    """Run each test in a scratch directory (for the disk caches) with cold Streamlit caches"""
+
+    def setUp(self):
+        cwd = os.getcwd()
+        scratch = tempfile.TemporaryDirectory()
+        os.chdir(scratch.name)
+        self.addCleanup(scratch.cleanup)
+        self.addCleanup(os.chdir, cwd)
+
+        patcher = mock.patch("mftool.Mftool", FakeMftool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(setattr, FakeMftool, "navs", {})
+
+        st.cache_data.clear()
+        st.cache_resource.clear()
+
+    def assertRanCleanly(self, at):
+        self.assertEqual([e.value for e in at.exception], [])
+
+
+class DailyReturnsTest(AppTestCase):
+
+    def test_zero_to_zero_nav_is_dropped(self):
+        navs = synthetic_navs("100000")
+        navs[300:302] = 0.0
+        FakeMftool.navs = {"100000": navs}
+
+        at = AppTest.from_function(_daily_returns_script, args=(APP_PATH, "100000"), default_timeout=60).run()
+        self.assertRanCleanly(at)
+
+        returns = at.session_state["daily_returns"]
+        expected = pd.Series(navs).round(4).pct_change().dropna().to_numpy()
+        self.assertFalse(np.isnan(returns).any())
+        np.testing.assert_allclose(returns, expected)
+
+
+class CompareTest(AppTestCase):
+
+    def test_zero_nav_followed_by_positive_nav(self):
+        # A zero NAV followed by a positive one gives an infinite daily return
+        navs = {}
+        for code in ("100000", "100003"):
+            navs[code] = synthetic_navs(code)
+            navs[code][200] = 0.0
+        FakeMftool.navs = navs
+
+        at = AppTest.from_file(APP_PATH, default_timeout=60)
+        at.session_state["selected_schemes"] = dict(SCHEMES)
+        at.run()
+        at.sidebar.radio[0].set_value("🔄 Compare").run()
+        at.multiselect[0].set_value(["100000", "100003", "100004"]).run()
+
+        self.assertRanCleanly(at)
+        self.assertIn("Daily Returns Distribution", [subheader.value for subheader in at.subheader])
+
+
+if __name__ == "__main__":
+    unittest.main()